@@ -1,155 +1,95 @@
-from flask import Flask, request, jsonify
-import os
-import cv2
-import json
-import base64
-import uuid
-import matplotlib.pyplot as plt
-
-app = Flask(__name__)
-
-OUTPUT_DIR = "output"
-INPUT_DATA_FILES_DIR = "input_data_files"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(INPUT_DATA_FILES_DIR, exist_ok=True)
-
-def validate_video_path(video_path):
-    if not os.path.exists(video_path):
-        return False, "Video path does not exist."
-    if not os.path.isfile(video_path):
-        return False, "Provided path is not a valid file."
-    if not video_path.lower().endswith(('.mp4', '.avi', '.mkv', '.mov')):
-        return False, "Unsupported video file format. Only .mp4, .avi, .mkv, .mov are allowed."
-    return True, None
-
-
-@app.route('/generate_images', methods=['POST'])
-def generate_images():
-    """
-    Extract frames from the video, preprocess them, and create JSONL files for the Batch API.
-    """
-    try:
-        data = request.json
-        video_path = data.get('video_path')
-
-        if not video_path:
-            return jsonify({"error": "Video path is required."}), 400
-
-        is_valid, error = validate_video_path(video_path)
-        if not is_valid:
-            return jsonify({"error": error}), 400
-
-        task_id = str(uuid.uuid4())
-        output_task_dir = os.path.join(OUTPUT_DIR, task_id)
-        jsonl_dir = os.path.join(INPUT_DATA_FILES_DIR, task_id)
-        os.makedirs(output_task_dir, exist_ok=True)
-        os.makedirs(jsonl_dir, exist_ok=True)
-
-        video = cv2.VideoCapture(video_path)
-        fps = int(video.get(cv2.CAP_PROP_FPS))
-        frame_interval = fps // 2
-        success, frame_count, extracted_count = True, 0, 0
-
-        frames = []
-        while success:
-            success, frame = video.read()
-            if frame_count % frame_interval == 0 and success:
-                resized_frame = cv2.resize(frame, (512, 512), interpolation=cv2.INTER_AREA)
-                frame_path = os.path.join(output_task_dir, f"frame_{extracted_count}.jpg")
-                cv2.imwrite(frame_path, resized_frame, [cv2.IMWRITE_JPEG_QUALITY, 85])  # Compress JPEG
-                frames.append(frame_path)
-                extracted_count += 1
-            frame_count += 1
-        video.release()
-
-        max_batch_size = 50000
-        current_batch_size = 0
-        batch_index = 1
-        tasks = []
-        batch_files = []
-
-        for i, frame_path in enumerate(frames):
-            with open(frame_path, "rb") as img_file:
-                img_base64 = base64.b64encode(img_file.read()).decode('utf-8')
-
-            tasks.append({
-                "custom_id": f"task-{i}",
-                "method": "POST",
-                "url": "/v1/chat/completions",
-                "body": {
-                    "model": "gpt-4o-mini",
-                    "temperature": 0,
-                    "max_tokens": 500,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a structured robot that processes gambling game images and outputs results in a strict format."
-                        },
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": "Extract the following fields from the images: Game name, Credit, Bet, Win, Total Win, Free spins left, Auto spins, Feature (boolean). Use the strict JSON schema below to format the output. If any value is not present, return N/A."},
-                                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_base64}", "detail": "low"}}
-                            ]
-                        }
-                    ],
-                    "response_format": {
-                        "type": "json_schema",
-                        "json_schema": {
-                            "name": "game_data",
-                            "schema": {
-                                "type": "object",
-                                "properties": {
-                                    "Game name": {"type": "string"},
-                                    "Credit": {"type": "string"},
-                                    "Bet": {"type": "string"},
-                                    "Win": {"type": "string"},
-                                    "Total Win": {"type": "string"},
-                                    "Free spins left": {"type": "string"},
-                                    "Auto spins": {"type": "string"},
-                                    "Feature": {"type": "boolean"}
-                                },
-                                "required": [
-                                    "Game name",
-                                    "Credit",
-                                    "Bet",
-                                    "Win",
-                                    "Total Win",
-                                    "Free spins left",
-                                    "Auto spins",
-                                    "Feature"
-                                ],
-                                "additionalProperties": False
-                            },
-                            "strict": True
-                        }
-                    }
-                }
-            })
-
-            current_batch_size += len(img_base64.encode('utf-8')) + len(json.dumps(tasks[-1]).encode('utf-8'))
-
-            if current_batch_size >= max_batch_size or i == len(frames) - 1:
-                batch_file = os.path.join(jsonl_dir, f"batch_{batch_index}.jsonl")
-                with open(batch_file, 'w') as file:
-                    for task in tasks:
-                        file.write(json.dumps(task) + '\n')
-                batch_files.append(batch_file)
-
-                tasks = []
-                current_batch_size = 0
-                batch_index += 1
-
-        return jsonify({
-            "message": "Frames and JSONL files generated successfully.",
-            "task_id": task_id,
-            "output_directory": output_task_dir,
-            "jsonl_files": batch_files,
-            "frame_count": extracted_count
-        }), 200
-
-    except Exception as e:
-        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
-
-if __name__ == '__main__':
-    app.run(debug=True)
+from flask import Flask, request, jsonify
+import os
+import cv2
+import uuid
+import matplotlib.pyplot as plt
+from frame_source import iter_frames, open_video, BACKENDS
+from frame_ring import iter_ring_frames
+from payload_encoder import PayloadEncoder, TARGET_PAYLOAD_BYTES, LOW_DETAIL_SIDE
+from batch_jsonl import ShardedJsonlWriter
+from request_builder import build_request, batch_line, image_part
+
+app = Flask(__name__)
+
+OUTPUT_DIR = "output"
+INPUT_DATA_FILES_DIR = "input_data_files"
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(INPUT_DATA_FILES_DIR, exist_ok=True)
+
+def validate_video_path(video_path):
+    if not os.path.exists(video_path):
+        return False, "Video path does not exist."
+    if not os.path.isfile(video_path):
+        return False, "Provided path is not a valid file."
+    if not video_path.lower().endswith(('.mp4', '.avi', '.mkv', '.mov')):
+        return False, "Unsupported video file format. Only .mp4, .avi, .mkv, .mov are allowed."
+    return True, None
+
+
+@app.route('/generate_images', methods=['POST'])
+def generate_images():
+    """
+    Extract frames from the video, preprocess them, and create JSONL files for the Batch API.
+    """
+    try:
+        data = request.json
+        video_path = data.get('video_path')
+
+        if not video_path:
+            return jsonify({"error": "Video path is required."}), 400
+
+        is_valid, error = validate_video_path(video_path)
+        if not is_valid:
+            return jsonify({"error": error}), 400
+
+        task_id = str(uuid.uuid4())
+        output_task_dir = os.path.join(OUTPUT_DIR, task_id)
+        jsonl_dir = os.path.join(INPUT_DATA_FILES_DIR, task_id)
+        os.makedirs(output_task_dir, exist_ok=True)
+        os.makedirs(jsonl_dir, exist_ok=True)
+
+        backend = data.get('decoder', 'cv2')
+        if backend not in BACKENDS:
+            return jsonify({"error": f"Unsupported decoder. Use one of: {', '.join(BACKENDS)}."}), 400
+
+        # Fit the low-detail 512px box, keeping the aspect ratio
+        video, _, _ = open_video(video_path)
+        width, height = video.get(cv2.CAP_PROP_FRAME_WIDTH), video.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        video.release()
+        scale = min(1.0, LOW_DETAIL_SIDE / max(width, height))
+        size = (int(width * scale), int(height * scale))
+        encoder = PayloadEncoder(max_bytes=int(data.get('payload_bytes', TARGET_PAYLOAD_BYTES)))
+
+        extracted_count = 0
+        # Frames are encoded once: the image bytes are kept on disk and streamed into the JSONL shards.
+        # Decoding runs ahead into a fixed ring of preallocated slots while this loop encodes.
+        with ShardedJsonlWriter(jsonl_dir) as writer:
+            frames = iter_ring_frames(iter_frames(video_path, seconds_per_frame=0.5, size=size, backend=backend),
+                                      shape=(size[1], size[0], 3))
+            for frame_index, timestamp_ms, resized_frame in frames:
+                image, mime = encoder.encode(resized_frame)
+                frame_path = os.path.join(output_task_dir, f"frame_{extracted_count}.{mime.split('/')[1]}")
+                with open(frame_path, "wb") as img_file:
+                    img_file.write(image)
+
+                writer.write(batch_line(f"task-{extracted_count}",
+                                        build_request([image_part(image, mime)], "gpt-4o-mini", max_tokens=500)),
+                             video=video_path, frames=[{"frame_index": frame_index, "timestamp_ms": timestamp_ms,
+                                                        "duplicate": False}])
+                extracted_count += 1
+
+        return jsonify({
+            "message": "Frames and JSONL files generated successfully.",
+            "task_id": task_id,
+            "output_directory": output_task_dir,
+            "jsonl_files": writer.shards,
+            "manifest": writer.manifest_path,
+            "frame_count": extracted_count,
+            "payload": encoder.report(task_id)
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+if __name__ == '__main__':
+    app.run(debug=True)
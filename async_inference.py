@@ -0,0 +1,225 @@
+import os
+import re
+import time
+import random
+import asyncio
+from collections import deque
+from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+from request_builder import cached_tokens
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 30000
+DEFAULT_CONCURRENCY = 8
+IMAGE_TOKENS_ESTIMATE = 85
+OUTPUT_TOKENS_ESTIMATE = 600
+_DONE = object()
+
+
+def estimate_request_tokens(request):
+    """Rough token count of a chat request (4 characters per text token, 85 per low-detail image)."""
+    tokens = request.get("max_tokens") or OUTPUT_TOKENS_ESTIMATE
+    for message in request.get("messages", []):
+        content = message["content"]
+        if isinstance(content, str):
+            tokens += len(content) // 4 + 4
+            continue
+        for part in content:
+            if part["type"] == "text":
+                tokens += len(part["text"]) // 4
+            elif part["type"] == "image_url":
+                tokens += IMAGE_TOKENS_ESTIMATE
+    return tokens
+
+
+def parse_reset_seconds(value):
+    """Parse rate-limit reset headers such as "1s", "6m0s" or "20ms" into seconds."""
+    if not value:
+        return None
+    seconds = 0.0
+    for amount, unit in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most capacity units, refilled at capacity per minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(float(amount), self.capacity)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount):
+        """Charge (positive) or refund (negative) units once the real cost of a request is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AsyncInferenceEngine:
+    """
+    Keep many chat completion requests in flight while respecting RPM/TPM limits.
+
+    Requests are rate limited by two token buckets (requests and estimated tokens) and a
+    concurrency cap. A 429 or an exhausted rate-limit header pauses every worker until
+    the reported reset (exponential backoff when none is given). Results are delivered
+    in submission order.
+    Point base_url at a local OpenAI-compatible server (see mock_openai_server.py) to test.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_retries=6,
+                 base_url=None, api_key=None, client=None):
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.base_url = base_url
+        self.api_key = api_key
+        self.client = client
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "prompt_tokens": 0, "cached_tokens": 0,
+                      "completion_tokens": 0}
+        self.latencies = {}
+
+    def _setup(self):
+        # Asyncio primitives are bound to the running loop, so they are created per run
+        self._client = self.client or AsyncOpenAI(api_key=self.api_key or os.environ.get("OPENAI_API_KEY"),
+                                                  base_url=self.base_url)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.request_bucket = TokenBucket(self.rpm)
+        self.token_bucket = TokenBucket(self.tpm)
+        self.paused_until = 0.0
+        self.loop = asyncio.get_running_loop()
+
+    async def _wait_for_pause(self):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _apply_headers(self, headers):
+        """Pause proactively when the server says a budget is exhausted."""
+        for budget in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{budget}")
+            if remaining is not None and remaining.isdigit() and int(remaining) == 0:
+                reset = parse_reset_seconds(headers.get(f"x-ratelimit-reset-{budget}"))
+                if reset:
+                    self._pause(reset)
+
+    async def complete(self, request):
+        """Run one chat completion with rate limiting and retries, returning the parsed response."""
+        estimate = estimate_request_tokens(request)
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_pause()
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(estimate)
+            try:
+                async with self.semaphore:
+                    started = time.monotonic()
+                    raw = await self._client.chat.completions.with_raw_response.create(**request)
+                    self.latencies[id(request)] = time.monotonic() - started
+            except RateLimitError as e:
+                self.stats["rate_limited"] += 1
+                retry_after = parse_reset_seconds(e.response.headers.get("x-ratelimit-reset-requests"))
+                header = e.response.headers.get("retry-after")
+                if header and header.replace(".", "", 1).isdigit():
+                    retry_after = float(header)
+                self._pause(retry_after or min(60.0, 2 ** attempt + random.random()))
+                self.token_bucket.drain()
+            except (APIConnectionError, APITimeoutError, InternalServerError):
+                await asyncio.sleep(min(60.0, 2 ** attempt + random.random()))
+            else:
+                self._apply_headers(raw.headers)
+                response = raw.parse()
+                self.stats["requests"] += 1
+                if response.usage is not None:
+                    self.stats["prompt_tokens"] += response.usage.prompt_tokens
+                    self.stats["cached_tokens"] += cached_tokens(response.usage)
+                    self.stats["completion_tokens"] += response.usage.completion_tokens
+                    self.token_bucket.adjust(response.usage.total_tokens - estimate)
+                return response
+            self.stats["retries"] += 1
+        raise RuntimeError(f"Request failed after {self.max_retries} retries.")
+
+    def complete_threadsafe(self, request):
+        """
+        Run one extra request from another thread while run() is going, blocking until it returns.
+
+        For follow-up requests made inside on_result (which runs in a worker thread): they
+        share the engine's buckets, concurrency cap and 429 backoff with the main requests.
+        """
+        return asyncio.run_coroutine_threadsafe(self.complete(request), self.loop).result()
+
+    def pop_latency(self, request):
+        """Seconds the successful attempt of a completed request took (None if unknown)."""
+        return self.latencies.pop(id(request), None)
+
+    async def _complete_optional(self, request):
+        if request is None:
+            return None
+        return await self.complete(request)
+
+    async def _run(self, requests, on_result):
+        self._setup()
+        iterator = iter(requests)
+        pending = deque()
+        results = []
+        exhausted = False
+        while True:
+            # Top up the window; the producer runs in a worker thread so decoding does not block the loop
+            while not exhausted and len(pending) < 2 * self.max_concurrency:
+                item = await asyncio.to_thread(next, iterator, _DONE)
+                if item is _DONE:
+                    exhausted = True
+                    break
+                key, request = item
+                pending.append((key, asyncio.create_task(self._complete_optional(request))))
+            if not pending:
+                break
+
+            key, task = pending.popleft()
+            response = await task
+            if on_result is not None:
+                await asyncio.to_thread(on_result, key, response)
+            else:
+                results.append((key, response))
+
+        if self.client is None:
+            await self._client.close()
+        return results
+
+    def run(self, requests, on_result=None):
+        """
+        Execute (key, request) pairs concurrently; a None request is passed through as a None response.
+
+        With on_result, on_result(key, response) is called in submission order as results
+        arrive, otherwise the ordered list of (key, response) pairs is returned.
+        """
+        return asyncio.run(self._run(requests, on_result))
+
+    def report(self, label="video"):
+        print(f"Async inference for {label}: {self.stats['requests']} requests, {self.stats['retries']} retries, "
+              f"{self.stats['rate_limited']} rate limited, {self.stats['cached_tokens']} of "
+              f"{self.stats['prompt_tokens']} prompt tokens cached.")
+        return dict(self.stats)
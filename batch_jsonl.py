@@ -0,0 +1,95 @@
+import os
+import json
+
+# Batch API input limits per file
+MAX_FILE_BYTES = 200 * 1024 * 1024
+MAX_REQUESTS_PER_FILE = 50000
+
+
+class ShardedJsonlWriter:
+    """
+    Stream Batch API requests to disk, starting a new shard before a file would exceed the limits.
+
+    Every request is written once, as soon as it is produced. A manifest line per request
+    maps its custom_id to the shard, the video and the frames (index, timestamp, duplicate
+    flag) it covers, so results can be joined back to frames later. Frames that need no
+    request (all duplicates) get a manifest line with custom_id None, so they still get rows.
+    """
+
+    def __init__(self, directory, prefix="batch", max_bytes=MAX_FILE_BYTES, max_requests=MAX_REQUESTS_PER_FILE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_requests = max_requests
+        self.shards = []
+        self.file = None
+        self.file_bytes = 0
+        self.file_requests = 0
+        self.total_requests = 0
+        self.manifest_path = os.path.join(directory, f"{prefix}_manifest.jsonl")
+        self.manifest = open(self.manifest_path, "w")
+
+    def _rotate(self):
+        if self.file:
+            self.file.close()
+        path = os.path.join(self.directory, f"{self.prefix}_{len(self.shards) + 1}.jsonl")
+        self.file = open(path, "wb")
+        self.shards.append(path)
+        self.file_bytes = 0
+        self.file_requests = 0
+
+    def write(self, request, video=None, frames=()):
+        """Append one request; frames is a list of {"frame_index", "timestamp_ms", "duplicate"} dicts."""
+        line = (json.dumps(request) + "\n").encode("utf-8")
+        if len(line) > self.max_bytes:
+            raise ValueError(f"Request {request['custom_id']} is larger than the {self.max_bytes} byte file limit.")
+        if (self.file is None or self.file_bytes + len(line) > self.max_bytes
+                or self.file_requests >= self.max_requests):
+            self._rotate()
+
+        self.file.write(line)
+        self.file_bytes += len(line)
+        self.file_requests += 1
+        self.total_requests += 1
+        self._write_manifest(request["custom_id"], os.path.basename(self.shards[-1]), video, frames)
+
+    def write_frames(self, video=None, frames=()):
+        """Record frames that are covered by no request; they reuse the result before them."""
+        self._write_manifest(None, None, video, frames)
+
+    def _write_manifest(self, custom_id, file, video, frames):
+        self.manifest.write(json.dumps({
+            "custom_id": custom_id,
+            "file": file,
+            "video": video,
+            "frames": list(frames)
+        }) + "\n")
+
+    def close(self):
+        """Close all files and return the shard paths."""
+        if self.file:
+            self.file.close()
+            self.file = None
+        if not self.manifest.closed:
+            self.manifest.close()
+        return self.shards
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_manifest(manifest_path):
+    """Yield manifest entries in the order the requests were written (video order)."""
+    with open(manifest_path, "r") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_manifest(manifest_path):
+    """Return {custom_id: manifest entry} for a manifest written by ShardedJsonlWriter."""
+    return {entry["custom_id"]: entry for entry in iter_manifest(manifest_path)}
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import threading
+import pandas as pd
+from openai import OpenAI
+from batch_jsonl import iter_manifest
+from hud_dedup import fill_forward
+from request_builder import parse_items, cached_tokens
+
+BATCH_DB_PATH = "cache/batches.sqlite"
+RESULTS_DIR = "output/batches"
+BASE_POLL_SECONDS = 30
+MAX_POLL_SECONDS = 600
+LIST_PAGE_SIZE = 100
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def iter_jsonl(path):
+    """Yield the JSON objects of a JSONL file one line at a time."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def parse_output_line(line):
+    """Return (custom_id, results, error, usage) for one line of a batch output or error file."""
+    custom_id = line.get("custom_id")
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code", 200) != 200:
+        return custom_id, None, line.get("error") or response.get("body", {}).get("error"), None
+    usage = response["body"].get("usage")
+    try:
+        items = parse_items(response["body"]["choices"][0]["message"]["content"])
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        return custom_id, None, {"message": f"Unreadable response: {e}"}, usage
+    return custom_id, items, None, usage
+
+
+class BatchManager:
+    """
+    Track Batch API jobs from creation to results.
+
+    Batch ids are persisted in SQLite together with the video and manifest they belong to,
+    so polling survives restarts. poll() checks every due batch in one pass (one list call
+    per page instead of one retrieve per batch) and backs off exponentially while a batch
+    is unchanged. Finished output and error files are streamed to disk and parsed line by
+    line, then joined back to the manifest frames by custom_id.
+    Point base_url at a local server (see mock_openai_server.py) to test.
+    """
+
+    def __init__(self, path=BATCH_DB_PATH, results_dir=RESULTS_DIR, client=None, base_url=None, api_key=None,
+                 base_interval=BASE_POLL_SECONDS, max_interval=MAX_POLL_SECONDS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.client = client or OpenAI(api_key=api_key or os.environ.get("OPENAI_API_KEY"), base_url=base_url)
+        self.results_dir = results_dir
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.lock = threading.Lock()
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            "batch_id TEXT PRIMARY KEY, video TEXT, manifest TEXT, status TEXT NOT NULL, "
+            "output_file_id TEXT, error_file_id TEXT, created_at REAL NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_poll REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS batches_manifest ON batches (manifest)")
+        self.db.commit()
+
+    def track(self, batch, video=None, manifest=None):
+        """Remember a batch returned by client.batches.create so it can be polled later."""
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, video, manifest, status, output_file_id, error_file_id, "
+                "created_at, attempts, next_poll) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)",
+                (batch.id, video, manifest, batch.status, batch.output_file_id, batch.error_file_id,
+                 batch.created_at or time.time(), time.time() + self.base_interval)
+            )
+            self.db.commit()
+
+    def batches(self, manifest=None):
+        """Return the tracked batches as dicts, optionally only those of one manifest."""
+        with self.lock:
+            if manifest is None:
+                rows = self.db.execute("SELECT * FROM batches ORDER BY created_at").fetchall()
+            else:
+                rows = self.db.execute("SELECT * FROM batches WHERE manifest = ? ORDER BY created_at",
+                                       (manifest,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def _backoff(self, attempts):
+        return min(self.max_interval, self.base_interval * 2 ** attempts) * (1 + 0.1 * random.random())
+
+    def _fetch(self, due):
+        """Fetch the current state of the due batches, listing pages until all are found."""
+        wanted = {row["batch_id"] for row in due}
+        oldest = min(row["created_at"] for row in due)
+        found = {}
+        if len(wanted) > 1:
+            for batch in self.client.batches.list(limit=LIST_PAGE_SIZE):
+                if batch.id in wanted:
+                    found[batch.id] = batch
+                # The list is newest first, so stop once everything is found or older than any batch we track
+                if len(found) == len(wanted) or batch.created_at < oldest:
+                    break
+        for batch_id in wanted - set(found):
+            found[batch_id] = self.client.batches.retrieve(batch_id)
+        return found
+
+    def poll(self, force=False):
+        """Refresh every unfinished batch whose backoff has expired; returns the number still pending."""
+        now = time.time()
+        pending = [row for row in self.batches() if row["status"] not in TERMINAL_STATUSES]
+        due = [row for row in pending if force or row["next_poll"] <= now]
+        if not due:
+            return len(pending)
+
+        found = self._fetch(due)
+        with self.lock:
+            for row in due:
+                batch = found[row["batch_id"]]
+                # A status change resets the backoff, an unchanged batch is polled less and less often
+                attempts = 0 if batch.status != row["status"] else row["attempts"] + 1
+                self.db.execute(
+                    "UPDATE batches SET status = ?, output_file_id = ?, error_file_id = ?, attempts = ?, "
+                    "next_poll = ? WHERE batch_id = ?",
+                    (batch.status, batch.output_file_id, batch.error_file_id, attempts,
+                     now + self._backoff(attempts), row["batch_id"])
+                )
+                if batch.status != row["status"]:
+                    print(f"Batch {row['batch_id']}: {row['status']} -> {batch.status}")
+            self.db.commit()
+        return sum(1 for row in self.batches() if row["status"] not in TERMINAL_STATUSES)
+
+    def wait(self, manifest=None, timeout=None):
+        """Poll until every batch (of one manifest) is finished; returns False on timeout."""
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            self.poll()
+            rows = [row for row in self.batches(manifest) if row["status"] not in TERMINAL_STATUSES]
+            if not rows:
+                return True
+            next_poll = min(row["next_poll"] for row in rows)
+            if deadline is not None and next_poll > deadline:
+                return False
+            time.sleep(max(0.0, next_poll - time.time()))
+
+    def download(self, file_id):
+        """Stream a file to the results directory (once) and return its local path."""
+        os.makedirs(self.results_dir, exist_ok=True)
+        path = os.path.join(self.results_dir, f"{file_id}.jsonl")
+        if not os.path.exists(path):
+            with self.client.files.with_streaming_response.content(file_id) as response:
+                response.stream_to_file(path + ".part")
+            os.replace(path + ".part", path)
+        return path
+
+    def collect(self, manifest):
+        """
+        Join the results of all batches of a manifest back to its frames.
+
+        Returns (DataFrame, errors): one row per manifest frame with "Timestamp (s)" and the
+        extracted fields, like the realtime path, and {custom_id: error} for failed requests.
+        Raises RuntimeError while some batch of the manifest is still running.
+        """
+        rows = self.batches(manifest)
+        if not rows:
+            raise KeyError(f"No batches tracked for manifest {manifest}")
+        running = [row["batch_id"] for row in rows if row["status"] not in TERMINAL_STATUSES]
+        if running:
+            raise RuntimeError(f"Batches still running: {', '.join(running)}")
+
+        results = {}
+        errors = {}
+        usage = {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        for row in rows:
+            for file_id in (row["output_file_id"], row["error_file_id"]):
+                if not file_id:
+                    continue
+                for line in iter_jsonl(self.download(file_id)):
+                    custom_id, items, error, line_usage = parse_output_line(line)
+                    if line_usage:
+                        usage["prompt_tokens"] += line_usage.get("prompt_tokens", 0)
+                        usage["cached_tokens"] += cached_tokens(line_usage)
+                        usage["completion_tokens"] += line_usage.get("completion_tokens", 0)
+                    if error is not None:
+                        errors[custom_id] = error
+                    else:
+                        results[custom_id] = items
+
+        # The manifest is in video order, so duplicates at the start of a request reuse the previous request's result
+        records = []
+        previous = None
+        for entry in iter_manifest(manifest):
+            frames = [(frame["frame_index"], frame["timestamp_ms"], None, frame["duplicate"])
+                      for frame in entry["frames"]]
+            aligned, previous = fill_forward(frames, results.get(entry["custom_id"], []), previous)
+            records.extend({"Timestamp (s)": frame[1] / 1000.0, **result} for frame, result in zip(frames, aligned))
+
+        print(f"Collected {len(records)} rows from {len(rows)} batch(es), {len(errors)} failed request(s), "
+              f"{usage['cached_tokens']} of {usage['prompt_tokens']} prompt tokens cached.")
+        return pd.DataFrame(records), errors
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+if __name__ == "__main__":
+    # python batch_manager.py <manifest.jsonl> [output.xlsx]; set OPENAI_BASE_URL to test against the mock server
+    import sys
+    manager = BatchManager(base_interval=5)
+    manager.wait(sys.argv[1])
+    df, failed = manager.collect(sys.argv[1])
+    excel_filename = sys.argv[2] if len(sys.argv) > 2 else f"{os.path.splitext(sys.argv[1])[0]}_results.xlsx"
+    df.to_excel(excel_filename, index=False)
+    print(f"Results saved to: {excel_filename}")
+    manager.close()
@@ -0,0 +1,105 @@
+from collections import deque
+
+MIN_BATCH_SIZE = 2
+MAX_BATCH_SIZE = 40
+TARGET_MISMATCH_RATE = 0.05
+MISMATCH_WINDOW = 20
+SETTLE_REQUESTS = 3
+SMOOTHING = 0.3
+
+
+class AdaptiveBatchSizer:
+    """
+    Choose how many frames go into the next request from what earlier requests measured.
+
+    Hill-climbs on frames per second of request latency: after SETTLE_REQUESTS requests at
+    a size it grows by step while throughput keeps improving and the model returns the
+    right number of items, and steps back when throughput drops. A window whose mismatch
+    rate (too few/many items or unparsable output) exceeds target_mismatch shrinks the
+    size multiplicatively, and sizes whose own mismatch rate is above target are not
+    tried again. With max_request_tokens the size is also capped by the
+    measured prompt tokens per frame. Call the sizer to get the current size.
+    """
+
+    def __init__(self, initial=10, min_size=MIN_BATCH_SIZE, max_size=MAX_BATCH_SIZE, step=2,
+                 target_mismatch=TARGET_MISMATCH_RATE, window=MISMATCH_WINDOW, max_request_tokens=None):
+        self.size = max(min_size, min(max_size, initial))
+        self.min_size = min_size
+        self.max_size = max_size
+        self.step = step
+        self.target_mismatch = target_mismatch
+        self.max_request_tokens = max_request_tokens
+        self.mismatches = deque(maxlen=window)
+        self.throughput = {}
+        self.samples = {}
+        self.failures = {}
+        self.tokens_per_frame = None
+        self.previous_size = None
+        self.requests = 0
+
+    def __call__(self):
+        return self.size
+
+    def mismatch_rate(self):
+        return sum(self.mismatches) / len(self.mismatches) if self.mismatches else 0.0
+
+    def _token_cap(self):
+        if not self.max_request_tokens or not self.tokens_per_frame:
+            return self.max_size
+        return max(self.min_size, int(self.max_request_tokens / self.tokens_per_frame))
+
+    def _too_risky(self, size):
+        """True once enough requests at a size show a mismatch rate above target."""
+        samples = self.samples.get(size, 0)
+        return samples >= SETTLE_REQUESTS and self.failures.get(size, 0) / samples > self.target_mismatch
+
+    def _move(self, size):
+        size = max(self.min_size, min(self.max_size, self._token_cap(), size))
+        if size > self.size and self._too_risky(size):
+            return
+        if size != self.size:
+            self.previous_size = self.size
+            self.size = size
+
+    def record(self, sent, returned, latency, prompt_tokens=None):
+        """Feed back one finished request: frames sent, items returned, seconds taken and prompt tokens."""
+        if sent <= 0:
+            return
+        self.requests += 1
+        self.mismatches.append(returned != sent)
+        if latency and latency > 0:
+            fps = sent / latency
+            old = self.throughput.get(sent)
+            self.throughput[sent] = fps if old is None else (1 - SMOOTHING) * old + SMOOTHING * fps
+        self.samples[sent] = self.samples.get(sent, 0) + 1
+        self.failures[sent] = self.failures.get(sent, 0) + (returned != sent)
+        if prompt_tokens:
+            per_frame = prompt_tokens / sent
+            self.tokens_per_frame = per_frame if self.tokens_per_frame is None else (
+                (1 - SMOOTHING) * self.tokens_per_frame + SMOOTHING * per_frame)
+
+        if self.mismatch_rate() > self.target_mismatch and returned != sent:
+            self.mismatches.clear()
+            self._move(int(self.size * 0.7))
+            return
+        if self._too_risky(self.size):
+            self._move(self.size - self.step)
+            return
+        if self.samples.get(self.size, 0) < SETTLE_REQUESTS:
+            return
+
+        current = self.throughput.get(self.size, 0.0)
+        previous = self.throughput.get(self.previous_size, 0.0) if self.previous_size else 0.0
+        if self.previous_size and self.previous_size < self.size and current < 0.95 * previous:
+            # Growing made things slower: go back and stay there
+            self.max_size = self.previous_size
+            self._move(self.previous_size)
+        elif self.mismatch_rate() <= self.target_mismatch / 2:
+            self._move(self.size + self.step)
+
+    def report(self, label="video"):
+        sizes = ", ".join(f"{size}: {fps:.1f} fps" for size, fps in sorted(self.throughput.items()))
+        print(f"Adaptive batching for {label}: size {self.size} after {self.requests} requests, "
+              f"mismatch rate {100 * self.mismatch_rate():.0f}%, throughput by size {{{sizes}}}.")
+        return {"size": self.size, "requests": self.requests, "mismatch_rate": self.mismatch_rate(),
+                "throughput": dict(self.throughput), "tokens_per_frame": self.tokens_per_frame}
@@ -0,0 +1,62 @@
+import sys
+import time
+from itertools import islice
+from frame_source import iter_frames
+from digit_reader import DigitReader
+from gpt4ovideo import process_frames, new_usage_stats, report_usage
+
+
+def _normalise(value):
+    return "".join(str(value).split()).upper() if value is not None else ""
+
+
+def run_benchmark(video_path, game, seconds_per_frame=0.5, frames=200, batch_size=10):
+    """
+    Compare the local digit reader with the model on the same frames.
+
+    The model labels every frame; the reader learns from the first half (kept out of
+    GLYPHS_DIR) and reads the second half. Prints frames per second of both and, per
+    field, how often a confident local read agrees with the model.
+    """
+    sampled = list(islice(iter_frames(video_path, seconds_per_frame), frames))
+    usage_stats = new_usage_stats()
+    labels = []
+    start = time.perf_counter()
+    for i in range(0, len(sampled), batch_size):
+        chunk = sampled[i:i + batch_size]
+        labels.extend(result or {} for _, result in process_frames(
+            [frame for _, _, frame in chunk], [timestamp for _, timestamp, _ in chunk], usage_stats=usage_stats))
+    model_seconds = time.perf_counter() - start
+
+    reader = DigitReader(game, glyphs_dir="output/benchmark_glyphs")
+    if reader.missing_boxes:
+        raise ValueError(f"The HUD layout of {game!r} has no box for {', '.join(reader.missing_boxes)}.")
+    half = len(sampled) // 2
+    for (_, _, frame), label in zip(sampled[:half], labels[:half]):
+        reader.learn(frame, label)
+
+    agree = {field: 0 for field in reader.boxes}
+    confident = 0
+    start = time.perf_counter()
+    reads = [reader.read(frame) for _, _, frame in sampled[half:]]
+    local_seconds = time.perf_counter() - start
+    for (values, _), label in zip(reads, labels[half:]):
+        if values is None:
+            continue
+        confident += 1
+        for field in reader.boxes:
+            agree[field] += _normalise(values[field]) == _normalise(label.get(field))
+
+    tested = len(sampled) - half
+    print(f"Model: {len(sampled)} frames in {model_seconds:.1f}s ({len(sampled) / max(model_seconds, 1e-9):.1f} frames/s)")
+    print(f"Local: {tested} frames in {local_seconds:.2f}s ({tested / max(local_seconds, 1e-9):.1f} frames/s), "
+          f"{confident} confident ({100 * confident / max(1, tested):.0f}%)")
+    for field, count in agree.items():
+        print(f"{field:>16}: {100 * count / max(1, confident):.1f}% agreement on confident reads")
+    report_usage(usage_stats, video_path)
+    reader.report(video_path)
+
+
+if __name__ == "__main__":
+    # python benchmark_digit_reader.py <video> <game> [frames]
+    run_benchmark(sys.argv[1], sys.argv[2], frames=int(sys.argv[3]) if len(sys.argv) > 3 else 200)
@@ -0,0 +1,63 @@
+import os
+import time
+import cv2
+import numpy as np
+from frame_source import iter_frames, iter_frames_seek
+
+SYNTHETIC_VIDEO_PATH = "data/synthetic_30min.mp4"
+
+
+def make_synthetic_clip(video_path, minutes=30, fps=30, size=(640, 360)):
+    """Write a synthetic clip with moving reels and a ticking HUD counter."""
+    if os.path.exists(video_path):
+        return video_path
+    os.makedirs(os.path.dirname(video_path) or ".", exist_ok=True)
+
+    width, height = size
+    writer = None
+    for codec in ("avc1", "mp4v"):
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*codec), fps, size)
+        if writer.isOpened():
+            break
+    if writer is None or not writer.isOpened():
+        raise RuntimeError("No usable video encoder found for the synthetic clip.")
+
+    total_frames = int(minutes * 60 * fps)
+    rng = np.random.default_rng(0)
+    reels = rng.integers(0, 255, size=(height * 2, width, 3), dtype=np.uint8)
+    print(f"Writing {total_frames} synthetic frames to {video_path}...")
+    for i in range(total_frames):
+        offset = (i * 7) % height
+        frame = np.ascontiguousarray(reels[offset:offset + height])
+        cv2.rectangle(frame, (0, height - 40), (width, height), (20, 20, 20), -1)
+        cv2.putText(frame, f"CREDIT {100000 - i // fps}  BET 1.00", (10, height - 12),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        writer.write(frame)
+    writer.release()
+    return video_path
+
+
+def time_source(source, video_path, seconds_per_frame, **kwargs):
+    """Consume a frame source and return (elapsed seconds, frames yielded)."""
+    start = time.perf_counter()
+    count = sum(1 for _ in source(video_path, seconds_per_frame=seconds_per_frame, **kwargs))
+    return time.perf_counter() - start, count
+
+
+def run_benchmark(video_path=SYNTHETIC_VIDEO_PATH, seconds_per_frame=0.5):
+    make_synthetic_clip(video_path)
+    cases = [
+        ("seek", iter_frames_seek, {}),
+        ("cv2", iter_frames, {"backend": "cv2"}),
+        ("ffmpeg", iter_frames, {"backend": "ffmpeg"}),
+        ("cv2 512x512", iter_frames, {"backend": "cv2", "size": (512, 512)}),
+        ("ffmpeg 512x512", iter_frames, {"backend": "ffmpeg", "size": (512, 512)}),
+        ("ffmpeg keyframes", iter_frames, {"backend": "ffmpeg", "keyframes_only": True}),
+    ]
+    for name, source, kwargs in cases:
+        elapsed, count = time_source(source, video_path, seconds_per_frame, **kwargs)
+        print(f"{name:>16}: {count} frames in {elapsed:.1f}s ({count / elapsed:.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,47 @@
+import sys
+from itertools import islice
+from frame_source import iter_frames
+from payload_encoder import PayloadEncoder
+from request_builder import FIELDS
+from gpt4ovideo import process_frames
+
+BUDGETS = (96 * 1024, 48 * 1024, 24 * 1024, 12 * 1024)
+
+
+def _normalise(value):
+    return "".join(str(value).split()).upper() if value is not None else ""
+
+
+def read_frames(frames, batch_size=10, encoder=None):
+    """Model answers for a list of frames, encoded by encoder (default-quality JPEG without one)."""
+    results = []
+    for i in range(0, len(frames), batch_size):
+        chunk = frames[i:i + batch_size]
+        results.extend(result or {} for _, result in process_frames(chunk, [None] * len(chunk), encoder=encoder))
+    return results
+
+
+def run_benchmark(video_path, seconds_per_frame=2, frames=50, budgets=BUDGETS, detail="low"):
+    """
+    Calibrate payload budgets by how often the model reads the HUD the same as at full quality.
+
+    The reference reading uses default-quality JPEG at full resolution; every budget then
+    re-reads the same frames through a PayloadEncoder. Prints bytes per frame and the
+    per-field agreement with the reference for each budget.
+    """
+    sampled = [frame for _, _, frame in islice(iter_frames(video_path, seconds_per_frame), frames)]
+    reference = read_frames(sampled)
+    for budget in budgets:
+        encoder = PayloadEncoder(max_bytes=budget, detail=detail)
+        results = read_frames(sampled, encoder=encoder)
+        stats = encoder.report(f"{budget // 1024} KB budget")
+        agreement = {field: sum(_normalise(result.get(field)) == _normalise(expected.get(field))
+                                for result, expected in zip(results, reference)) / max(1, len(reference))
+                     for field in FIELDS}
+        print(f"{budget // 1024:>4} KB: {stats['bytes_per_frame'] / 1024:.1f} KB per frame, agreement "
+              + ", ".join(f"{field} {100 * share:.0f}%" for field, share in agreement.items()))
+
+
+if __name__ == "__main__":
+    # python benchmark_payload_encoder.py <video> [frames]
+    run_benchmark(sys.argv[1], frames=int(sys.argv[2]) if len(sys.argv) > 2 else 50)
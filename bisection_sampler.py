@@ -0,0 +1,103 @@
+import sys
+from itertools import islice
+from frame_source import iter_frames, open_video, frame_interval_for, read_frames_at
+from hud_layout import resolve_hud_boxes, crop_hud
+from result_sinks import ColumnarAccumulator
+from gpt4ovideo import process_frames, new_usage_stats, report_usage
+
+COARSE_SECONDS = 8
+RESOLUTION_SECONDS = 0.5
+# Each round halves the intervals still in doubt, so this is far beyond any real video
+MAX_ROUNDS = 32
+KEY_FIELDS = ("Credit", "Win", "Total Win", "Free spins left")
+
+
+def _normalise(value):
+    return str(value).strip().lower() if value is not None else ""
+
+
+def values_differ(result_a, result_b, fields=KEY_FIELDS):
+    """True when any of the tracked fields reads differently in the two results."""
+    return any(_normalise(result_a.get(field)) != _normalise(result_b.get(field)) for field in fields)
+
+
+def bisect_video(video_path, coarse_seconds=COARSE_SECONDS, resolution_seconds=RESOLUTION_SECONDS, fields=KEY_FIELDS,
+                 batch_size=10, game=None, hud_crop=False, cache=None):
+    """
+    Find the points where the HUD values change with far fewer model calls than fixed sampling.
+
+    Frames are first read every coarse_seconds. Each round then queries the midpoints of
+    all intervals whose endpoints disagree on one of the fields, until every change is
+    bracketed to within resolution_seconds. A change that reverts inside one coarse
+    interval (same values at both ends) is not seen, so coarse_seconds should stay below
+    the shortest state worth catching.
+
+    Returns (timeline, samples): one row per change point with "Timestamp (s)" (first
+    sample showing the new values), "Previous sample (s)" (last sample with the old
+    values) and the fields, plus {frame_index: result} for every frame queried (None for
+    frames that could not be decoded; intervals around them are not split further).
+    """
+    video, fps, total_frames = open_video(video_path)
+    video.release()
+    coarse = frame_interval_for(fps, coarse_seconds)
+    resolution = frame_interval_for(fps, resolution_seconds)
+    boxes = resolve_hud_boxes(iter_frames(video_path, coarse_seconds), game)[0] if hud_crop else None
+    usage_stats = new_usage_stats()
+    samples = {}
+
+    def query(frame_indices):
+        remaining = sorted(set(frame_indices))
+        while remaining:
+            # Frames are read batch_size at a time and cropped as they come, never a whole round at once
+            frames = ((frame_index, timestamp, crop_hud(frame, boxes) if boxes else frame)
+                      for frame_index, timestamp, frame in read_frames_at(video_path, remaining))
+            while True:
+                chunk = list(islice(frames, batch_size))
+                if not chunk:
+                    break
+                results = process_frames([image for _, _, image in chunk],
+                                         [timestamp for _, timestamp, _ in chunk], bool(boxes), False,
+                                         usage_stats, cache)
+                for (frame_index, _, _), (_, result) in zip(chunk, results):
+                    samples[frame_index] = result or {}
+            # read_frames_at stops at a frame it cannot decode: mark it unreadable, retry the ones after it
+            unread = [frame_index for frame_index in remaining if frame_index not in samples]
+            if unread:
+                samples[unread[0]] = None
+            remaining = unread[1:]
+
+    pending = sorted(set(range(0, total_frames, coarse)) | {max(0, total_frames - 1)})
+    rounds = 0
+    while pending and rounds < MAX_ROUNDS:
+        rounds += 1
+        print(f"Bisection round {rounds}: querying {len(pending)} frames.")
+        query(pending)
+        ordered = sorted(frame_index for frame_index, result in samples.items() if result is not None)
+        pending = sorted({(a + b) // 2 for a, b in zip(ordered, ordered[1:])
+                          if b - a > resolution and values_differ(samples[a], samples[b], fields)} - set(samples))
+    if pending:
+        print(f"Bisection stopped after {MAX_ROUNDS} rounds with {len(pending)} frames still to query.")
+
+    timeline = ColumnarAccumulator(["Timestamp (s)", "Previous sample (s)"])
+    previous = None
+    for frame_index in sorted(frame_index for frame_index, result in samples.items() if result is not None):
+        if previous is None or values_differ(samples[previous], samples[frame_index], fields):
+            timeline.append([{
+                "Timestamp (s)": frame_index / fps,
+                "Previous sample (s)": previous / fps if previous is not None else None,
+                **samples[frame_index]
+            }])
+        previous = frame_index
+
+    fixed = -(-total_frames // resolution)
+    print(f"Bisection found {len(timeline) - 1} change(s) in {rounds} rounds with {len(samples)} frames, "
+          f"{100 * len(samples) / max(1, fixed):.0f}% of the {fixed} frames sampling every "
+          f"{resolution_seconds}s would send.")
+    report_usage(usage_stats, video_path)
+    return timeline.to_frame(), samples
+
+
+if __name__ == "__main__":
+    # python bisection_sampler.py <video> [coarse seconds] [resolution seconds]
+    timeline_df, _ = bisect_video(sys.argv[1], *(float(arg) for arg in sys.argv[2:4]))
+    print(timeline_df)
@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+
+CHECKPOINT_DIR = "cache/checkpoints"
+FINGERPRINT_CHUNK_BYTES = 1024 * 1024
+
+
+def video_fingerprint(video_path):
+    """Cheap content fingerprint: file size plus a hash of the first and last megabyte."""
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha256(str(size).encode("utf-8"))
+    with open(video_path, "rb") as file:
+        digest.update(file.read(FINGERPRINT_CHUNK_BYTES))
+        if size > FINGERPRINT_CHUNK_BYTES:
+            file.seek(max(FINGERPRINT_CHUNK_BYTES, size - FINGERPRINT_CHUNK_BYTES))
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def run_key(video_path, params):
+    """Checkpoint key of one run: the video fingerprint plus every parameter that changes the results."""
+    digest = hashlib.sha256(video_fingerprint(video_path).encode("utf-8"))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+class CheckpointStore:
+    """
+    Append-only log of the batches a run has finished.
+
+    Each line holds one batch: its last frame index, its rows and the last result (for
+    fill-forward across batches). Lines are flushed and fsynced when written, so a crash
+    loses at most the batch in flight; a torn last line is ignored on load.
+    """
+
+    def __init__(self, key, directory=CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{key}.jsonl")
+        self.file = None
+
+    def load(self):
+        """Return the committed batch records in order."""
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        valid = 0
+        with open(self.path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                valid += len(line)
+        if os.path.getsize(self.path) != valid:
+            # Drop a torn tail so new records are appended after the last complete line
+            os.truncate(self.path, valid)
+        return records
+
+    def append(self, last_frame_index, rows, last_result):
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps({"last_frame_index": last_frame_index, "rows": rows,
+                                    "last_result": last_result}) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,153 @@
+import math
+import json
+import base64
+from functools import lru_cache
+import cv2
+import numpy as np
+from hud_mosaic import image_tokens, mosaic_canvas, mosaic_instructions
+from request_builder import system_message, response_format, count_instructions
+
+# USD per 1M tokens: (input, cached input, output); the Batch API bills half of both
+PRICING = {
+    "gpt-4o-2024-08-06": (2.50, 1.25, 10.00),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini-2024-07-18": (0.15, 0.075, 0.60),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+# gpt-4o-mini bills images at 2833 base + 5667 per tile, i.e. gpt-4o's image tokens scaled up
+IMAGE_TOKEN_SCALE = {"gpt-4o-mini-2024-07-18": 2833 / 85, "gpt-4o-mini": 2833 / 85}
+BATCH_DISCOUNT = 0.5
+BATCH_COMPLETION_HOURS = 24
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMING_TOKENS = 3
+# Tokens of one answered item
+OUTPUT_TOKENS_PER_FRAME = 70
+BASE_LATENCY_SECONDS = 1.5
+OUTPUT_TOKENS_PER_SECOND = 80
+
+
+@lru_cache(maxsize=64)
+def text_tokens(text, model="gpt-4o-2024-08-06"):
+    """Tokens of a text with the model's tiktoken encoding (4 characters per token without tiktoken)."""
+    try:
+        import tiktoken
+    except ImportError:
+        return len(text) // 4
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return len(encoding.encode(text))
+
+
+def prompt_tokens_for(model="gpt-4o-2024-08-06", hud_cropped=False, mosaic=False, count=10):
+    """
+    Text tokens of one request as request_builder builds it, counted once per prompt variant.
+
+    Covers the system message (prompt and instructions), the response_format JSON schema
+    and the per-request item count text; message overhead is added by the caller.
+    """
+    text = mosaic_instructions(count) if mosaic else count_instructions(count)
+    return (text_tokens(system_message(hud_cropped)["content"], model)
+            + text_tokens(json.dumps(response_format(None, mosaic)), model) + text_tokens(text, model))
+
+
+def image_part_tokens(image_url, model="gpt-4o-2024-08-06"):
+    """
+    Tokens of one image_url content part.
+
+    Low detail is a flat rate. Otherwise the size is read from a base64 data URL; remote
+    URLs are counted as a single 512px tile since their size is unknown offline.
+    """
+    detail = image_url.get("detail", "auto")
+    width, height = 512, 512
+    url = image_url.get("url", "")
+    if detail != "low" and url.startswith("data:"):
+        data = np.frombuffer(base64.b64decode(url.split(",", 1)[1]), dtype=np.uint8)
+        image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+        if image is not None:
+            height, width = image.shape[:2]
+    return round(image_tokens(width, height, "low" if detail == "low" else "high") * IMAGE_TOKEN_SCALE.get(model, 1.0))
+
+
+def usage_cost(prompt_tokens, completion_tokens, model="gpt-4o-2024-08-06", cached_tokens=0, batch=False):
+    """Dollar cost of a request (or a whole run) from its token counts."""
+    input_rate, cached_rate, output_rate = PRICING[model]
+    dollars = ((prompt_tokens - cached_tokens) * input_rate + cached_tokens * cached_rate
+               + completion_tokens * output_rate) / 1_000_000
+    return dollars * BATCH_DISCOUNT if batch else dollars
+
+
+def estimate_job(duration_seconds, seconds_per_frame=1, crop_size=(512, 512), detail="low", images_per_request=10,
+                 model="gpt-4o-2024-08-06", mosaic=False, duplicate_ratio=0.0, prompt_tokens=None,
+                 output_tokens_per_frame=OUTPUT_TOKENS_PER_FRAME, rpm=500, tpm=30000, concurrency=8,
+                 hud_cropped=False):
+    """
+    Project tokens, cost and wall time of one planned run without calling the API.
+
+    crop_size is the (width, height) of the image sent per frame (the HUD strip or the
+    resized frame); with mosaic=True each request sends one mosaic canvas of the given
+    detail instead of images_per_request separate images. duplicate_ratio is the expected
+    share of frames skipped by dedup. The prompt is counted from request_builder's actual
+    static prefix unless prompt_tokens is given. Realtime time is limited by RPM, TPM and
+    concurrency over an estimated latency; Batch time is the completion window.
+    """
+    frames = math.ceil(duration_seconds / seconds_per_frame)
+    sent = math.ceil(frames * (1.0 - duplicate_ratio))
+    requests = math.ceil(sent / images_per_request) if sent else 0
+    size = mosaic_canvas(detail) if mosaic else crop_size
+    per_image = round(image_tokens(*size, detail) * IMAGE_TOKEN_SCALE.get(model, 1.0))
+
+    if prompt_tokens is None:
+        prompt_tokens = prompt_tokens_for(model, hud_cropped, mosaic, images_per_request)
+    static = prompt_tokens + 2 * TOKENS_PER_MESSAGE + REPLY_PRIMING_TOKENS
+    image_total = requests * per_image if mosaic else sent * per_image
+    text_total = requests * static
+    output_total = sent * output_tokens_per_frame
+    input_total = text_total + image_total
+
+    tokens_per_request = (input_total + output_total) / requests if requests else 0
+    latency = BASE_LATENCY_SECONDS + output_tokens_per_frame * images_per_request / OUTPUT_TOKENS_PER_SECOND
+    per_minute = min(rpm, tpm / tokens_per_request if tokens_per_request else rpm, concurrency * 60.0 / latency)
+    realtime_seconds = 60.0 * requests / per_minute if requests else 0.0
+
+    return {
+        "frames": frames, "frames_sent": sent, "requests": requests, "text_tokens": text_total,
+        "image_tokens": image_total, "output_tokens": output_total, "tokens_per_frame": (
+            (input_total + output_total) / frames if frames else 0.0),
+        "realtime": {"cost": usage_cost(input_total, output_total, model), "seconds": realtime_seconds,
+                     "requests_per_minute": per_minute},
+        "batch": {"cost": usage_cost(input_total, output_total, model, batch=True),
+                  "max_hours": BATCH_COMPLETION_HOURS, "files": math.ceil(requests / 50000) if requests else 0},
+    }
+
+
+def estimate_jobs(jobs):
+    """Estimate many planned runs (dicts of estimate_job keyword arguments) and total their costs."""
+    estimates = [estimate_job(**job) for job in jobs]
+    totals = {
+        "realtime_cost": sum(estimate["realtime"]["cost"] for estimate in estimates),
+        "batch_cost": sum(estimate["batch"]["cost"] for estimate in estimates),
+        "realtime_seconds": sum(estimate["realtime"]["seconds"] for estimate in estimates),
+    }
+    return estimates, totals
+
+
+def report(estimate, label="job"):
+    realtime, batch = estimate["realtime"], estimate["batch"]
+    print(f"{label}: {estimate['frames']} frames, {estimate['requests']} requests, "
+          f"{estimate['text_tokens'] + estimate['image_tokens']} input "
+          f"({estimate['image_tokens']} image) and {estimate['output_tokens']} output tokens. "
+          f"Realtime ${realtime['cost']:.2f} in {realtime['seconds'] / 60:.1f} min, "
+          f"Batch ${batch['cost']:.2f} within {batch['max_hours']}h.")
+
+
+if __name__ == "__main__":
+    # One hour of video under the layouts the pipeline supports
+    for label, options in [
+        ("full frame, low detail", {}),
+        ("HUD strip, high detail", {"crop_size": (1280, 180), "detail": "high", "hud_cropped": True}),
+        ("HUD mosaic, low detail", {"crop_size": (512, 512), "mosaic": True, "hud_cropped": True}),
+        ("full frame, gpt-4o-mini", {"model": "gpt-4o-mini"}),
+    ]:
+        report(estimate_job(3600, **options), label)
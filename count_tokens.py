@@ -1,93 +1,101 @@
-import tiktoken
-
-def num_tokens_from_messages(messages, model="gpt-4o-2024-08-06"):
-    """Return the number of tokens used by a list of messages."""
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        print("Warning: model not found. Using o200k_base encoding.")
-        encoding = tiktoken.get_encoding("o200k_base")
-    if model in {
-        "gpt-3.5-turbo-0125",
-        "gpt-4-0314",
-        "gpt-4-32k-0314",
-        "gpt-4-0613",
-        "gpt-4-32k-0613",
-        "gpt-4o-mini-2024-07-18",
-        "gpt-4o-2024-08-06"
-        }:
-        tokens_per_message = 3
-        tokens_per_name = 1
-    elif "gpt-3.5-turbo" in model:
-        print("Warning: gpt-3.5-turbo may update over time. Returning num tokens assuming gpt-3.5-turbo-0125.")
-        return num_tokens_from_messages(messages, model="gpt-3.5-turbo-0125")
-    elif "gpt-4o-mini" in model:
-        print("Warning: gpt-4o-mini may update over time. Returning num tokens assuming gpt-4o-mini-2024-07-18.")
-        return num_tokens_from_messages(messages, model="gpt-4o-mini-2024-07-18")
-    elif "gpt-4o" in model:
-        print("Warning: gpt-4o and gpt-4o-mini may update over time. Returning num tokens assuming gpt-4o-2024-08-06.")
-        return num_tokens_from_messages(messages, model="gpt-4o-2024-08-06")
-    elif "gpt-4" in model:
-        print("Warning: gpt-4 may update over time. Returning num tokens assuming gpt-4-0613.")
-        return num_tokens_from_messages(messages, model="gpt-4-0613")
-    else:
-        raise NotImplementedError(
-            f"""num_tokens_from_messages() is not implemented for model {model}."""
-        )
-    num_tokens = 0
-    for message in messages:
-        num_tokens += tokens_per_message
-        for key, value in message.items():
-            num_tokens += len(encoding.encode(value))
-            if key == "name":
-                num_tokens += tokens_per_name
-    num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
-    return num_tokens
-
-
-
-from openai import OpenAI
-import os
-
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "<your OpenAI API key if not set as env var>"))
-
-example_messages = [
-    {
-        "role": "system",
-        "content": "Find the following things in the images: Game name | Credit | Bet | Win | Total Win | Free spins left | Auto spins | Feature (boolean). Follow this exact structure and give me pd.Series output, these being the column names. Differentiate between free spins left and auto spins. Feature means the bonus feature if he's playing it in the game. Usually, the feature comes with free spins left. So basically, if there's Feature - True, it should have free spins left (usually, depends on the game). If there's Feature - False, it MIGHT have auto spins. You should be able to determine which one is present. If something is not present in the image, just pass N/A in the field.",
-    },
-    {
-        "role": "system",
-        "name": "example_user",
-        "content": "New synergies will help drive top-line growth.",
-    },
-    {
-        "role": "system",
-        "name": "example_assistant",
-        "content": "Things working well together will increase revenue.",
-    },
-    {
-        "role": "system",
-        "name": "example_user",
-        "content": "Let's circle back when we have more bandwidth to touch base on opportunities for increased leverage.",
-    },
-    {
-        "role": "system",
-        "name": "example_assistant",
-        "content": "Let's talk later when we're less busy about how to do better.",
-    },
-    {
-        "role": "user",
-        "content": "This late pivot means we don't have time to boil the ocean for the client deliverable.",
-    },
-]
-
-for model in [
-    "gpt-3.5-turbo",
-    "gpt-4-0613",
-    "gpt-4",
-    "gpt-4o",
-    "gpt-4o-mini"
-    ]:
-    print(model)
-    print(f"{num_tokens_from_messages(example_messages, model)} prompt tokens counted by num_tokens_from_messages().")
+import os
+import tiktoken
+from openai import OpenAI
+from cost_estimator import image_part_tokens
+
+def num_tokens_from_messages(messages, model="gpt-4o-2024-08-06"):
+    """Return the number of tokens used by a list of messages."""
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        print("Warning: model not found. Using o200k_base encoding.")
+        encoding = tiktoken.get_encoding("o200k_base")
+    if model in {
+        "gpt-3.5-turbo-0125",
+        "gpt-4-0314",
+        "gpt-4-32k-0314",
+        "gpt-4-0613",
+        "gpt-4-32k-0613",
+        "gpt-4o-mini-2024-07-18",
+        "gpt-4o-2024-08-06"
+        }:
+        tokens_per_message = 3
+        tokens_per_name = 1
+    elif "gpt-3.5-turbo" in model:
+        print("Warning: gpt-3.5-turbo may update over time. Returning num tokens assuming gpt-3.5-turbo-0125.")
+        return num_tokens_from_messages(messages, model="gpt-3.5-turbo-0125")
+    elif "gpt-4o-mini" in model:
+        print("Warning: gpt-4o-mini may update over time. Returning num tokens assuming gpt-4o-mini-2024-07-18.")
+        return num_tokens_from_messages(messages, model="gpt-4o-mini-2024-07-18")
+    elif "gpt-4o" in model:
+        print("Warning: gpt-4o and gpt-4o-mini may update over time. Returning num tokens assuming gpt-4o-2024-08-06.")
+        return num_tokens_from_messages(messages, model="gpt-4o-2024-08-06")
+    elif "gpt-4" in model:
+        print("Warning: gpt-4 may update over time. Returning num tokens assuming gpt-4-0613.")
+        return num_tokens_from_messages(messages, model="gpt-4-0613")
+    else:
+        raise NotImplementedError(
+            f"""num_tokens_from_messages() is not implemented for model {model}."""
+        )
+    num_tokens = 0
+    for message in messages:
+        num_tokens += tokens_per_message
+        for key, value in message.items():
+            if isinstance(value, list):
+                # Multimodal content: text parts are encoded, image parts cost their tile tokens
+                for part in value:
+                    if part["type"] == "text":
+                        num_tokens += len(encoding.encode(part["text"]))
+                    elif part["type"] == "image_url":
+                        num_tokens += image_part_tokens(part["image_url"], model)
+                continue
+            num_tokens += len(encoding.encode(value))
+            if key == "name":
+                num_tokens += tokens_per_name
+    num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
+    return num_tokens
+
+
+if __name__ == "__main__":
+    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "<your OpenAI API key if not set as env var>"))
+
+    example_messages = [
+        {
+            "role": "system",
+            "content": "Find the following things in the images: Game name | Credit | Bet | Win | Total Win | Free spins left | Auto spins | Feature (boolean). Follow this exact structure and give me pd.Series output, these being the column names. Differentiate between free spins left and auto spins. Feature means the bonus feature if he's playing it in the game. Usually, the feature comes with free spins left. So basically, if there's Feature - True, it should have free spins left (usually, depends on the game). If there's Feature - False, it MIGHT have auto spins. You should be able to determine which one is present. If something is not present in the image, just pass N/A in the field.",
+        },
+        {
+            "role": "system",
+            "name": "example_user",
+            "content": "New synergies will help drive top-line growth.",
+        },
+        {
+            "role": "system",
+            "name": "example_assistant",
+            "content": "Things working well together will increase revenue.",
+        },
+        {
+            "role": "system",
+            "name": "example_user",
+            "content": "Let's circle back when we have more bandwidth to touch base on opportunities for increased leverage.",
+        },
+        {
+            "role": "system",
+            "name": "example_assistant",
+            "content": "Let's talk later when we're less busy about how to do better.",
+        },
+        {
+            "role": "user",
+            "content": "This late pivot means we don't have time to boil the ocean for the client deliverable.",
+        },
+    ]
+
+    for model in [
+        "gpt-3.5-turbo",
+        "gpt-4-0613",
+        "gpt-4",
+        "gpt-4o",
+        "gpt-4o-mini"
+        ]:
+        print(model)
+        print(f"{num_tokens_from_messages(example_messages, model)} prompt tokens counted by num_tokens_from_messages().")
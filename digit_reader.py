@@ -0,0 +1,170 @@
+import os
+import cv2
+import numpy as np
+from hud_layout import get_layout, to_pixel_box, boxes_by_field, label_key, HUD_LAYOUTS_PATH
+
+GLYPHS_DIR = "glyphs"
+GLYPH_SIZE = (12, 20)
+MATCH_THRESHOLD = 0.85
+# Different digits of one font already score up to ~0.80 against each other, so the best
+# template must also beat the runner-up by this much
+MATCH_MARGIN = 0.1
+NUMERIC_FIELDS = ("Credit", "Bet", "Win", "Total Win", "Free spins left", "Auto spins")
+
+
+def field_boxes(game, fields=NUMERIC_FIELDS, layouts_path=HUD_LAYOUTS_PATH):
+    """{field: normalised box} for the fields that have their own labelled box in the game's layout."""
+    return boxes_by_field(get_layout(game, layouts_path), fields)
+
+
+def segment_glyphs(crop):
+    """
+    Split a field crop into glyph images, left to right.
+
+    The crop is binarised with Otsu (text made the foreground whatever its colour) and
+    cut at empty columns. Returns [(glyph, height ratio)], the ratio telling a '.' or ','
+    apart from a digit once glyphs are resized to GLYPH_SIZE.
+    """
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) > binary.size / 2:
+        binary = 255 - binary
+
+    columns = np.flatnonzero(binary.any(axis=0))
+    glyphs = []
+    if not len(columns):
+        return glyphs
+    runs = np.split(columns, np.flatnonzero(np.diff(columns) > 1) + 1)
+    for run in runs:
+        strip = binary[:, run[0]:run[-1] + 1]
+        rows = np.flatnonzero(strip.any(axis=1))
+        glyph = strip[rows[0]:rows[-1] + 1]
+        resized = cv2.resize(glyph, GLYPH_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+        glyphs.append((resized, glyph.shape[0] / binary.shape[0]))
+    return glyphs
+
+
+class DigitReader:
+    """
+    CPU-only reader for numeric HUD fields rendered in a game's fixed font.
+
+    Glyph templates are learned from frames the model has already labelled: a field crop
+    whose glyph count matches the characters of the model's value contributes one sample
+    per character. Reading matches every glyph against the templates (share of agreeing
+    pixels, minus the height-ratio difference) and reports the weakest glyph score as
+    the field confidence; a glyph whose best template does not beat the runner-up by
+    margin scores 0, so the frame goes to the model. A frame is only read locally when every field has its own box
+    in the layout and reads confidently; a field without a box would otherwise be
+    carried over from an earlier row instead of being read. Templates are stored per
+    game under GLYPHS_DIR.
+    """
+
+    def __init__(self, game, fields=NUMERIC_FIELDS, threshold=MATCH_THRESHOLD, glyphs_dir=GLYPHS_DIR,
+                 layouts_path=HUD_LAYOUTS_PATH, margin=MATCH_MARGIN):
+        self.game = game
+        self.fields = tuple(fields)
+        self.threshold = threshold
+        self.margin = margin
+        self.boxes = field_boxes(game, fields, layouts_path) if game else {}
+        self.path = os.path.join(glyphs_dir, f"{label_key(game).replace(' ', '_')}.npz") if game else None
+        self.sums = {}
+        self.counts = {}
+        self.ratios = {}
+        self.stats = {"read": 0, "local": 0, "learned": 0}
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    @property
+    def missing_boxes(self):
+        """Fields without their own box in the game's layout; any makes local reads impossible."""
+        return [field for field in self.fields if field not in self.boxes]
+
+    @property
+    def ready(self):
+        """Whether every field has a box and at least one glyph template has been learned."""
+        return bool(self.game and not self.missing_boxes and self.sums)
+
+    def _crop(self, frame, field):
+        height, width = frame.shape[:2]
+        x, y, w, h = to_pixel_box(self.boxes[field], width, height)
+        return frame[y:y + h, x:x + w]
+
+    def learn(self, frame, result):
+        """Add the glyphs of every field whose glyph count matches the model's value."""
+        for field in self.boxes:
+            text = "".join(str(result.get(field, "")).split())
+            if not text or text.upper() in ("N/A", "UNKNOWN"):
+                continue
+            glyphs = segment_glyphs(self._crop(frame, field))
+            if len(glyphs) != len(text):
+                continue
+            for char, (glyph, ratio) in zip(text, glyphs):
+                # sums last: read() lists chars from it while encode workers may be learning
+                self.counts[char] = self.counts.get(char, 0) + 1
+                self.ratios[char] = self.ratios.get(char, 0.0) + ratio
+                self.sums[char] = self.sums.get(char, 0) + glyph
+            self.stats["learned"] += 1
+
+    def read_field(self, frame, field):
+        """Return (text, confidence) for one field."""
+        glyphs = segment_glyphs(self._crop(frame, field))
+        if not glyphs or not self.sums:
+            return None, 0.0
+        chars = list(self.sums)
+        templates = [self.sums[char] / self.counts[char] for char in chars]
+        ratios = [self.ratios[char] / self.counts[char] for char in chars]
+        text = []
+        confidence = 1.0
+        for glyph, ratio in glyphs:
+            scores = np.array([1.0 - float(np.abs(glyph - template).mean()) - abs(ratio - template_ratio)
+                               for template, template_ratio in zip(templates, ratios)])
+            best = int(np.argmax(scores))
+            text.append(chars[best])
+            runner_up = float(np.partition(scores, -2)[-2]) if len(scores) > 1 else 0.0
+            # An ambiguous glyph ("3" vs "8") makes the whole field unconfident
+            score = float(scores[best]) if scores[best] - runner_up >= self.margin else 0.0
+            confidence = min(confidence, score)
+        return "".join(text), confidence
+
+    def read(self, frame):
+        """
+        Read every numeric field locally.
+
+        Returns (values, confidences); values is None when the game is unknown, some field
+        has no box or any field falls below the threshold, meaning the frame should go to
+        the model.
+        """
+        self.stats["read"] += 1
+        if not self.ready:
+            return None, {}
+        values = {}
+        confidences = {}
+        for field in self.fields:
+            values[field], confidences[field] = self.read_field(frame, field)
+        if min(confidences.values()) < self.threshold:
+            return None, confidences
+        self.stats["local"] += 1
+        return values, confidences
+
+    def save(self):
+        if not self.path or not self.sums:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        chars = list(self.sums)
+        np.savez(self.path, chars=np.array(chars), sums=np.stack([self.sums[char] for char in chars]),
+                 counts=np.array([self.counts[char] for char in chars]),
+                 ratios=np.array([self.ratios[char] for char in chars]))
+
+    def load(self):
+        data = np.load(self.path)
+        for char, glyph_sum, count, ratio in zip(data["chars"], data["sums"], data["counts"], data["ratios"]):
+            self.sums[str(char)] = glyph_sum
+            self.counts[str(char)] = int(count)
+            self.ratios[str(char)] = float(ratio)
+
+    def report(self, label="video"):
+        read = self.stats["read"]
+        print(f"Digit reader for {label}: {self.stats['local']} of {read} frames read locally "
+              f"({100 * self.stats['local'] / max(1, read):.0f}%), {self.stats['learned']} fields learned, "
+              f"{len(self.sums)} glyph templates.")
+        return dict(self.stats)
@@ -0,0 +1,84 @@
+import threading
+from hud_layout import get_layout, hud_crop_boxes, boxes_by_field, to_pixel_box, HUD_LAYOUTS_PATH
+from hud_dedup import hud_signature, changed_pixels
+from request_builder import FIELDS, schema_fields
+
+# Field crops are compared at this width; one changed digit then changes 100+ pixels
+SIGNATURE_WIDTH = 320
+# Changed pixels (after noise filtering) in a field's region that count as a new value
+FIELD_CHANGE_THRESHOLD = 32
+
+
+def field_regions(game, hud_cropped=False, layouts_path=HUD_LAYOUTS_PATH):
+    """{field: normalised box} of the fields with their own layout box, in frame or HUD crop coordinates."""
+    layout = get_layout(game, layouts_path)
+    if not layout:
+        return {}
+    return boxes_by_field(hud_crop_boxes(layout) if hud_cropped else layout, FIELDS)
+
+
+class FieldChangeTracker:
+    """
+    Decide per sent frame which fields have to be asked again.
+
+    Every field with a region is diffed on its own against its state the last time it
+    was queried, counting changed pixels like HudDeduplicator so a single changed digit
+    always counts as a change; fields without a region (Feature, usually Game name) are asked whenever
+    a request is sent. Frames where no region changed need no request at all and carry
+    the previous row forward. observe_batch must see batches in stream order.
+    """
+
+    def __init__(self, regions, threshold=FIELD_CHANGE_THRESHOLD):
+        self.regions = regions
+        self.threshold = threshold
+        self.last = {}
+        self.lock = threading.Lock()
+        self.stats = {"frames": 0, "unchanged": 0, "fields_asked": 0, "requests": 0}
+
+    def _signatures(self, frame):
+        height, width = frame.shape[:2]
+        signatures = {}
+        for field, box in self.regions.items():
+            x, y, w, h = to_pixel_box(box, width, height)
+            if w > 0 and h > 0:
+                signatures[field] = hud_signature(frame[y:y + h, x:x + w], SIGNATURE_WIDTH)
+        return signatures
+
+    def observe_batch(self, batch):
+        """Frozenset of changed region fields for every sent frame of a batch."""
+        changes = []
+        for entry in batch:
+            if entry[3]:
+                continue
+            signatures = self._signatures(entry[2])
+            with self.lock:
+                changed = frozenset(field for field, signature in signatures.items()
+                                    if field not in self.last or signature.shape != self.last[field].shape
+                                    or changed_pixels(signature, self.last[field]) > self.threshold)
+                for field in changed:
+                    self.last[field] = signatures[field]
+                self.stats["frames"] += 1
+                self.stats["unchanged"] += not changed
+            changes.append(changed)
+        return changes
+
+    def invalidate(self):
+        """Forget every region state, e.g. after a frame came back without an answer."""
+        with self.lock:
+            self.last = {}
+
+    def fields_for(self, changes, base=None):
+        """The fields to ask for a request: changed region fields plus fields without a region, within base."""
+        asked = tuple(field for field in (base or FIELDS)
+                      if field not in self.regions or any(field in changed for changed in changes))
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["fields_asked"] += len(asked)
+        return schema_fields(asked)
+
+    def report(self, label="video"):
+        stats = self.stats
+        print(f"Field tracking for {label}: {len(self.regions)} field region(s), {stats['unchanged']} of "
+              f"{stats['frames']} sent frames unchanged, {stats['fields_asked'] / max(1, stats['requests']):.1f} "
+              f"of {len(FIELDS)} fields asked per request.")
+        return dict(stats)
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import mmap
+import cv2
+import numpy as np
+from checkpoint import run_key, video_fingerprint
+
+ARCHIVE_DIR = "cache/frames"
+ARCHIVE_FORMATS = ("jpeg", "raw")
+ARCHIVE_JPEG_QUALITY = 95
+
+
+def archive_config(seconds_per_frame=1, backend="cv2", size=None, crop=None):
+    """The sampling parameters an archive is keyed on."""
+    return {"seconds_per_frame": float(seconds_per_frame), "backend": backend,
+            "size": list(size) if size else None, "crop": list(crop) if crop else None}
+
+
+def archive_paths(video_path, config, directory=ARCHIVE_DIR):
+    """(data path, index path) of the archive for a video and sampling configuration."""
+    base = os.path.join(directory, run_key(video_path, config))
+    return f"{base}.frames", f"{base}.json"
+
+
+def find_archive(video_path, seconds_per_frame=1, backend="cv2", size=None, crop=None, directory=ARCHIVE_DIR):
+    """Index path of a complete archive for these sampling parameters, or None."""
+    if not os.path.isdir(directory):
+        return None
+    data_path, index_path = archive_paths(video_path, archive_config(seconds_per_frame, backend, size, crop),
+                                          directory)
+    return index_path if os.path.exists(index_path) and os.path.exists(data_path) else None
+
+
+class FrameArchiveWriter:
+    """
+    Write sampled frames into one packed file plus a JSON index.
+
+    Frames are appended back to back, JPEG-encoded or raw BGR (zero decode cost on read,
+    best for small HUD crops), and the index records (frame_index, timestamp_ms, offset,
+    length) per frame with the source fingerprint and sampling parameters. Both files are
+    written under .part names and only renamed by close(), so readers never see a
+    partial archive.
+    """
+
+    def __init__(self, video_path, config, fmt="jpeg", quality=ARCHIVE_JPEG_QUALITY, directory=ARCHIVE_DIR):
+        if fmt not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format: {fmt}. Expected one of {ARCHIVE_FORMATS}.")
+        os.makedirs(directory, exist_ok=True)
+        self.data_path, self.index_path = archive_paths(video_path, config, directory)
+        self.fmt = fmt
+        self.quality = quality
+        self.index = {"video": video_path, "source": video_fingerprint(video_path), **config, "format": fmt,
+                      "shape": None, "frames": []}
+        self.file = open(f"{self.data_path}.part", "wb")
+        self.offset = 0
+
+    def write(self, frame_index, timestamp_ms, frame):
+        if self.fmt == "raw":
+            if self.index["shape"] is None:
+                self.index["shape"] = list(frame.shape)
+            elif list(frame.shape) != self.index["shape"]:
+                raise ValueError(f"Raw archives need a constant frame shape, got {frame.shape}.")
+            data = np.ascontiguousarray(frame).tobytes()
+        else:
+            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            data = buffer.tobytes()
+        self.file.write(data)
+        self.index["frames"].append([frame_index, timestamp_ms, self.offset, len(data)])
+        self.offset += len(data)
+
+    def close(self):
+        self.file.close()
+        with open(f"{self.index_path}.part", "w") as file:
+            json.dump(self.index, file)
+        os.replace(f"{self.data_path}.part", self.data_path)
+        os.replace(f"{self.index_path}.part", self.index_path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(f"{self.data_path}.part")
+
+
+def iter_archive(index_path, max_frames=None, start_frame=0, end_frame=None):
+    """
+    Yield (frame_index, timestamp_ms, frame) from an archive through a read-only mmap.
+
+    Raw frames are read-only views into the mapping (no copy); JPEG frames are decoded
+    from it. The mapping is closed once the last view is gone.
+    """
+    with open(index_path, "r") as file:
+        index = json.load(file)
+    entries = [entry for entry in index["frames"]
+               if entry[0] >= start_frame and (end_frame is None or entry[0] < end_frame)]
+    if max_frames is not None:
+        entries = entries[:max_frames]
+    if not entries:
+        return
+
+    with open(index_path[:-len(".json")] + ".frames", "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    shape = tuple(index["shape"]) if index["format"] == "raw" else None
+    for frame_index, timestamp_ms, offset, length in entries:
+        buffer = np.frombuffer(mapping, dtype=np.uint8, count=length, offset=offset)
+        frame = buffer.reshape(shape) if shape else cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        yield frame_index, timestamp_ms, frame
+
+
+if __name__ == "__main__":
+    # python frame_archive.py <video> [seconds per frame] [jpeg|raw]
+    from frame_source import build_frame_archive
+    build_frame_archive(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 1,
+                        fmt=sys.argv[3] if len(sys.argv) > 3 else "jpeg")
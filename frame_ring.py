@@ -0,0 +1,109 @@
+import threading
+import cv2
+import numpy as np
+
+RING_CAPACITY = 16
+
+
+class FrameRing:
+    """
+    Fixed-capacity ring of preallocated frame slots shared by a decoding and an encoding stage.
+
+    put() copies (or resizes) a frame into the next free slot and blocks while every slot
+    is filled or still held by the consumer. Iterating yields (frame_index, timestamp_ms,
+    view) in order; each view stays valid until release() is called for it, which must
+    happen in the same order. Slots are allocated once, on the first frame unless shape is
+    given, so memory stays at capacity frames whatever the video length.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY, shape=None, dtype=np.uint8):
+        self.capacity = capacity
+        self.slots = np.empty((capacity, *shape), dtype=dtype) if shape else None
+        self.meta = [None] * capacity
+        self.written = 0
+        self.read = 0
+        self.released = 0
+        self.closed = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def _slot_for(self, frame):
+        if self.slots is None:
+            self.slots = np.empty((self.capacity, *frame.shape), dtype=frame.dtype)
+        return self.slots[self.written % self.capacity]
+
+    def put(self, frame_index, timestamp_ms, frame):
+        with self.condition:
+            while self.written - self.released >= self.capacity and not self.closed:
+                self.condition.wait()
+            if self.closed:
+                return False
+            slot = self._slot_for(frame)
+        if frame.shape == slot.shape:
+            np.copyto(slot, frame)
+        else:
+            cv2.resize(frame, (slot.shape[1], slot.shape[0]), dst=slot, interpolation=cv2.INTER_AREA)
+        with self.condition:
+            self.meta[self.written % self.capacity] = (frame_index, timestamp_ms)
+            self.written += 1
+            self.condition.notify_all()
+        return True
+
+    def close(self, error=None):
+        """End the stream; the consumer drains what is left, then sees the error if there is one."""
+        with self.condition:
+            self.closed = True
+            self.error = self.error or error
+            self.condition.notify_all()
+
+    def release(self, count=1):
+        with self.condition:
+            self.released = min(self.read, self.released + count)
+            self.condition.notify_all()
+
+    def __iter__(self):
+        while True:
+            with self.condition:
+                while self.read == self.written and not self.closed:
+                    self.condition.wait()
+                if self.read == self.written:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                index = self.read % self.capacity
+                self.read += 1
+            frame_index, timestamp_ms = self.meta[index]
+            yield frame_index, timestamp_ms, self.slots[index]
+
+
+def fill_ring(ring, frames):
+    """Copy a (frame_index, timestamp_ms, frame) iterator into a ring on a daemon thread."""
+    def run():
+        try:
+            for frame_index, timestamp_ms, frame in frames:
+                if not ring.put(frame_index, timestamp_ms, frame):
+                    return
+            ring.close()
+        except BaseException as e:
+            ring.close(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def iter_ring_frames(frames, capacity=RING_CAPACITY, shape=None):
+    """
+    Decode a frame iterator ahead into a FrameRing and yield (frame_index, timestamp_ms, view).
+
+    Each view is released when the next frame is requested, so the consumer has to be
+    done with a frame (encoded it, hashed it) before moving on; copy it to keep it.
+    """
+    ring = FrameRing(capacity, shape)
+    fill_ring(ring, frames)
+    try:
+        for item in ring:
+            yield item
+            ring.release()
+    finally:
+        ring.close()
@@ -0,0 +1,253 @@
+import os
+import json
+import subprocess
+import cv2
+import numpy as np
+from frame_archive import FrameArchiveWriter, archive_config, find_archive, iter_archive
+
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.environ.get("FFPROBE_BIN", "ffprobe")
+BACKENDS = ("cv2", "ffmpeg")
+SEEK_THRESHOLD_FRAMES = 250
+
+
+def open_video(video_path):
+    """Open a video with OpenCV and return (capture, fps, total_frames)."""
+    video = cv2.VideoCapture(video_path)
+    if not video.isOpened():
+        raise FileNotFoundError(f"Could not open video file: {video_path}")
+
+    fps = video.get(cv2.CAP_PROP_FPS)
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    return video, fps, total_frames
+
+
+def frame_interval_for(fps, seconds_per_frame):
+    """Number of source frames between two sampled frames (at least 1)."""
+    return max(1, int(round(fps * seconds_per_frame)))
+
+
+def iter_frames(video_path, seconds_per_frame=1, max_frames=None, backend="cv2", size=None, crop=None,
+                keyframes_only=False, start_frame=0, end_frame=None, use_archive=True):
+    """
+    Yield (frame_index, timestamp_ms, frame) for every sampled frame of the video.
+
+    backend selects the decoder ("cv2" or "ffmpeg"). crop is an (x, y, w, h) pixel box and
+    size a (width, height) target, applied in that order. keyframes_only ignores
+    seconds_per_frame and yields only the keyframes (ffmpeg backend only).
+    start_frame/end_frame restrict the cv2 backend to a half-open frame range; sampling
+    stays on the global grid, so adjacent ranges never share or skip a sampled frame.
+    When a frame archive (see build_frame_archive) exists for the video and these sampling
+    parameters, frames are streamed from it instead of decoding the video.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown decoder backend: {backend}. Expected one of {BACKENDS}.")
+    if backend == "cv2" and keyframes_only:
+        raise ValueError("keyframes_only is only supported by the ffmpeg backend.")
+    if backend == "ffmpeg" and (start_frame or end_frame is not None):
+        raise ValueError("Frame ranges are only supported by the cv2 backend.")
+
+    archive = find_archive(video_path, seconds_per_frame, backend, size, crop) if use_archive and not keyframes_only \
+        else None
+    if archive:
+        return iter_archive(archive, max_frames, start_frame, end_frame)
+    if backend == "cv2":
+        return _iter_frames_cv2(video_path, seconds_per_frame, max_frames, size, crop, start_frame, end_frame)
+    return _iter_frames_ffmpeg(video_path, seconds_per_frame, max_frames, size, crop, keyframes_only)
+
+
+def build_frame_archive(video_path, seconds_per_frame=1, backend="cv2", size=None, crop=None, fmt="jpeg"):
+    """Decode the sampled frames of a video once into a packed archive that iter_frames then reads."""
+    writer = FrameArchiveWriter(video_path, archive_config(seconds_per_frame, backend, size, crop), fmt)
+    try:
+        for frame_index, timestamp_ms, frame in iter_frames(video_path, seconds_per_frame, backend=backend, size=size,
+                                                            crop=crop, use_archive=False):
+            writer.write(frame_index, timestamp_ms, frame)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    print(f"Archived {len(writer.index['frames'])} frames ({writer.offset / 1e6:.1f} MB, {fmt}) to {writer.data_path}.")
+    return writer.index_path
+
+
+def _iter_frames_cv2(video_path, seconds_per_frame, max_frames, size, crop, start_frame=0, end_frame=None):
+    """
+    Read the video strictly forward with OpenCV.
+
+    Skipped frames are only grabbed (demuxed and decoded into the codec's internal buffer,
+    no colour conversion or copy), sampled frames are retrieved. This avoids the
+    seek-to-keyframe cost that CAP_PROP_POS_FRAMES pays on every sampled frame.
+    """
+    video, fps, _ = open_video(video_path)
+    frame_interval = frame_interval_for(fps, seconds_per_frame)
+
+    if start_frame:
+        video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    frame_index = start_frame
+    sampled = 0
+    try:
+        while (max_frames is None or sampled < max_frames) and (end_frame is None or frame_index < end_frame):
+            if not video.grab():
+                break
+
+            if frame_index % frame_interval == 0:
+                success, frame = video.retrieve()
+                if not success:
+                    print(f"Failed to decode frame at position {frame_index}.")
+                    break
+                if crop:
+                    x, y, w, h = crop
+                    frame = frame[y:y + h, x:x + w]
+                if size:
+                    frame = cv2.resize(frame, tuple(size), interpolation=cv2.INTER_AREA)
+                yield frame_index, frame_index * 1000.0 / fps, frame
+                sampled += 1
+
+            frame_index += 1
+    finally:
+        video.release()
+
+
+def read_frames_at(video_path, frame_indices, seek_threshold=SEEK_THRESHOLD_FRAMES):
+    """
+    Yield (frame_index, timestamp_ms, frame) for arbitrary frame indices, in ascending order.
+
+    Short gaps are grabbed forward like _iter_frames_cv2; gaps longer than seek_threshold
+    frames seek instead, which is cheaper than decoding everything in between.
+    """
+    video, fps, _ = open_video(video_path)
+    position = 0
+    try:
+        for frame_index in sorted(set(frame_indices)):
+            if frame_index - position > seek_threshold:
+                video.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+                position = frame_index
+            while position < frame_index:
+                if not video.grab():
+                    return
+                position += 1
+            success, frame = video.read()
+            if not success:
+                print(f"Failed to decode frame at position {frame_index}.")
+                return
+            position += 1
+            yield frame_index, frame_index * 1000.0 / fps, frame
+    finally:
+        video.release()
+
+
+def probe_video(video_path):
+    """Return (width, height, fps) of the first video stream using ffprobe."""
+    result = subprocess.run(
+        [FFPROBE_BIN, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate", "-of", "json", video_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise FileNotFoundError(f"Could not open video file: {video_path} ({result.stderr.strip()})")
+
+    stream = json.loads(result.stdout)["streams"][0]
+    fps = 0.0
+    for key in ("avg_frame_rate", "r_frame_rate"):
+        num, _, den = stream.get(key, "0/0").partition("/")
+        if float(den or 1) > 0 and float(num) > 0:
+            fps = float(num) / float(den or 1)
+            break
+    return int(stream["width"]), int(stream["height"]), fps
+
+
+def probe_keyframe_times(video_path):
+    """Return the sorted presentation times (seconds) of all keyframes, read from packet flags."""
+    result = subprocess.run(
+        [FFPROBE_BIN, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path],
+        capture_output=True, text=True, check=True
+    )
+    times = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            times.append(float(pts_time))
+    return sorted(times)
+
+
+def _iter_frames_ffmpeg(video_path, seconds_per_frame, max_frames, size, crop, keyframes_only):
+    """
+    Decode with a local ffmpeg process and read raw BGR frames from its stdout.
+
+    Sampling (fps=), cropping (crop=) and scaling (scale=) run inside ffmpeg's filter graph,
+    so Python only ever sees the final frames. In keyframes_only mode the decoder skips
+    every non-keyframe (-skip_frame nokey), which is much cheaper for coarse scans.
+    """
+    width, height, fps = probe_video(video_path)
+
+    filters = []
+    if not keyframes_only:
+        filters.append(f"fps=fps={1.0 / seconds_per_frame}")
+    if crop:
+        x, y, width, height = crop
+        filters.append(f"crop={width}:{height}:{x}:{y}")
+    if size:
+        width, height = size
+        filters.append(f"scale={width}:{height}:flags=area")
+
+    command = [FFMPEG_BIN, "-v", "error", "-nostdin"]
+    if keyframes_only:
+        command += ["-skip_frame", "nokey"]
+    command += ["-threads", "0", "-i", video_path, "-an", "-sn", "-dn"]
+    if filters:
+        command += ["-vf", ",".join(filters)]
+    if keyframes_only:
+        command += ["-vsync", "0"]
+    if max_frames is not None:
+        command += ["-frames:v", str(max_frames)]
+    command += ["-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+
+    if keyframes_only:
+        timestamps_ms = [t * 1000.0 for t in probe_keyframe_times(video_path)]
+    else:
+        timestamps_ms = None
+
+    frame_bytes = width * height * 3
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=frame_bytes)
+    sampled = 0
+    try:
+        while True:
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            if process.stdout.readinto(memoryview(frame).cast("B")) != frame_bytes:
+                break
+
+            if timestamps_ms is not None and sampled < len(timestamps_ms):
+                timestamp_ms = timestamps_ms[sampled]
+            else:
+                timestamp_ms = sampled * seconds_per_frame * 1000.0
+            yield int(round(timestamp_ms * fps / 1000.0)), timestamp_ms, frame
+            sampled += 1
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        _, stderr = process.communicate()
+        if process.returncode not in (0, -9) and stderr:
+            print(f"ffmpeg exited with code {process.returncode}: {stderr.decode(errors='replace').strip()}")
+
+
+def iter_frames_seek(video_path, seconds_per_frame=1, max_frames=None):
+    """Reference implementation of the old seek-per-frame loop, kept for benchmarking."""
+    video, fps, total_frames = open_video(video_path)
+    frame_interval = frame_interval_for(fps, seconds_per_frame)
+
+    current_frame = 0
+    sampled = 0
+    try:
+        while current_frame < total_frames and (max_frames is None or sampled < max_frames):
+            video.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
+            success, frame = video.read()
+            if not success:
+                break
+            yield current_frame, current_frame * 1000.0 / fps, frame
+            sampled += 1
+            current_frame += frame_interval
+    finally:
+        video.release()
@@ -0,0 +1,107 @@
+import threading
+import cv2
+from request_builder import FIELDS
+
+GAME_FIELD = "Game name"
+SESSION_FIELDS = tuple(name for name in FIELDS if name != GAME_FIELD)
+# HSV histogram correlation between consecutive sent frames below which a new scene starts
+SCENE_CHANGE_THRESHOLD = 0.5
+# Correlation with the first frame of an earlier scene above which it is taken to be the same game
+KNOWN_GAME_THRESHOLD = 0.9
+HISTOGRAM_BINS = [8, 8, 8]
+
+
+def frame_fingerprint(frame):
+    """Normalised HSV colour histogram of a frame or HUD crop; it stays close across the spins of one game."""
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1, 2], None, HISTOGRAM_BINS, [0, 180, 0, 256, 0, 256])
+    return cv2.normalize(hist, hist).flatten()
+
+
+def similarity(fingerprint_a, fingerprint_b):
+    return float(cv2.compareHist(fingerprint_a, fingerprint_b, cv2.HISTCMP_CORREL))
+
+
+def _known_name(value):
+    text = str(value or "").strip()
+    return text if text and text.upper() not in ("N/A", "UNKNOWN") else None
+
+
+class GameSession:
+    """
+    Track which game a stream shows so that most requests can leave out "Game name".
+
+    Sent frames are fingerprinted in order (observe_batch) and a frame that correlates
+    less than threshold with the previous one starts a new scene. A scene is named by
+    the first model answer that reads a game name, or right away when its first frame
+    matches a scene named earlier in the session. Requests for frames of named scenes
+    ask for SESSION_FIELDS only and their rows get the name filled in locally.
+    """
+
+    def __init__(self, game=None, threshold=SCENE_CHANGE_THRESHOLD, known_threshold=KNOWN_GAME_THRESHOLD):
+        self.initial_game = game
+        self.threshold = threshold
+        self.known_threshold = known_threshold
+        self.scene = 0
+        self.previous = None
+        self.first_fingerprints = {}
+        self.names = {}
+        self.lock = threading.Lock()
+        self.stats = {"frames": 0, "scenes": 0, "named_by_fingerprint": 0, "full_requests": 0,
+                      "reduced_requests": 0}
+
+    def _start_scene(self, fingerprint):
+        self.scene += 1
+        self.stats["scenes"] += 1
+        self.first_fingerprints[self.scene] = fingerprint
+        if self.scene == 1 and self.initial_game:
+            self.names[self.scene] = self.initial_game
+            return
+        matches = [(similarity(fingerprint, self.first_fingerprints[scene]), name)
+                   for scene, name in self.names.items()]
+        score, name = max(matches, default=(0.0, None))
+        if name is not None and score >= self.known_threshold:
+            self.names[self.scene] = name
+            self.stats["named_by_fingerprint"] += 1
+
+    def observe_batch(self, batch):
+        """Scene id of every sent frame of a batch; batches must be observed in stream order."""
+        scenes = []
+        for entry in batch:
+            if entry[3]:
+                continue
+            fingerprint = frame_fingerprint(entry[2])
+            with self.lock:
+                self.stats["frames"] += 1
+                if self.previous is None or similarity(fingerprint, self.previous) < self.threshold:
+                    self._start_scene(fingerprint)
+                self.previous = fingerprint
+                scenes.append(self.scene)
+        return scenes
+
+    def name(self, scene):
+        with self.lock:
+            return self.names.get(scene)
+
+    def fields_for(self, scenes):
+        """SESSION_FIELDS when every scene is already named, None (the full schema) otherwise."""
+        with self.lock:
+            reduced = bool(scenes) and all(scene in self.names for scene in scenes)
+            self.stats["reduced_requests" if reduced else "full_requests"] += 1
+        return SESSION_FIELDS if reduced else None
+
+    def learn(self, scene, result):
+        """Name a scene from a full-schema model answer."""
+        name = _known_name(result.get(GAME_FIELD))
+        if name is None:
+            return
+        with self.lock:
+            self.names.setdefault(scene, name)
+
+    def report(self, label="video"):
+        stats = self.stats
+        requests = stats["full_requests"] + stats["reduced_requests"]
+        print(f"Game session for {label}: {stats['scenes']} scene(s) over {stats['frames']} frames "
+              f"({stats['named_by_fingerprint']} named by fingerprint), {stats['reduced_requests']} of {requests} "
+              f"requests without {GAME_FIELD!r}. Games: {sorted(set(self.names.values()))}.")
+        return dict(stats)
@@ -1,145 +1,159 @@
-import os
-import cv2
-import json
-from openai import OpenAI
-
-# Model and client setup
-MODEL = "gpt-4o-2024-08-06"
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your_openai_api_key_here"))
-
-
-def validate_video_path(video_path):
-    """Validate if the video file exists and is readable."""
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Video file not found: {video_path}")
-    if not os.access(video_path, os.R_OK):
-        raise PermissionError(f"Cannot read video file: {video_path}")
-    return True
-
-
-def extract_frames(video_path, seconds_per_frame=0.5, max_frames=100):
-    """Extract frames from the video at regular intervals."""
-    video = cv2.VideoCapture(video_path)
-    if not video.isOpened():
-        raise ValueError(f"Cannot open video file: {video_path}")
-
-    fps = int(video.get(cv2.CAP_PROP_FPS))
-    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-    frame_interval = int(fps * seconds_per_frame)
-
-    extracted_frames = []
-    frame_count = 0
-    current_frame = 0
-
-    print(f"Extracting frames from video: {video_path}...")
-    while current_frame < total_frames and frame_count < max_frames:
-        video.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
-        success, frame = video.read()
-        if not success:
-            break
-
-        # Add the frame to the list
-        extracted_frames.append(frame)
-        frame_count += 1
-        current_frame += frame_interval
-
-    video.release()
-    print(f"Extracted {len(extracted_frames)} frames from video.")
-    return extracted_frames
-
-
-def prepare_jsonl_from_frames(frames):
-    """Prepare JSONL payload from extracted frames in batches of 10."""
-    jsonl_data = ""
-    batch_size = 10
-
-    # Split frames into batches of 10
-    for batch_idx in range(0, len(frames), batch_size):
-        batch_frames = frames[batch_idx:batch_idx + batch_size]
-
-        # Encode each frame in the batch as base64
-        encoded_images = []
-        for frame in batch_frames:
-            _, buffer = cv2.imencode('.jpg', frame)
-            base64_image = buffer.tobytes().hex()
-            encoded_images.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{base64_image}",
-                    "detail": "low"
-                }
-            })
-
-        # Create a single JSONL entry for this batch
-        jsonl_data += json.dumps({
-            "custom_id": f"batch-{batch_idx // batch_size}",
-            "method": "POST",
-            "url": "/v1/chat/completions",
-            "body": {
-                "model": MODEL,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a structured robot that outputs results from gambling frames in a strict format."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Find and fill these columns with the correct values from the game HUD and not from the game: "
-                                        "Game name, Credit, Bet, Win, Total Win, Free spins left, Auto spins and Feature (boolean). "
-                                        "Differentiate between free spins left and auto spins. Feature=True means the bonus feature "
-                                        "is active. Usually, the feature comes with free spins left. If Feature=False, it MIGHT have "
-                                        "auto spins. Sometimes, synonyms are used instead of the expected words, i.e. balance or coins "
-                                        "instead of credit, if you find such a word, extract their value for the 'credit' column. This "
-                                        "applies to all columns or for different languages. If something is not present in the image, "
-                                        "pass N/A in the field. Include currency in the output. ALWAYS return output from ALL 10 images."
-                            },
-                            *encoded_images
-                        ]
-                    }
-                ]
-            }
-        }) + "\n"
-
-    return jsonl_data
-
-
-def upload_jsonl(jsonl_data, filename):
-    """Upload JSONL data as a file to OpenAI."""
-    # Save the JSONL data to a temporary file
-    with open(filename, "w") as file:
-        file.write(jsonl_data)
-
-    # Upload the file
-    with open(filename, "rb") as file:
-        response = client.files.create(file=file, purpose="batch")
-
-    # Check response
-    if "id" not in response:
-        raise Exception(f"File upload failed: {response}")
-    return response["id"]
-
-
-def create_batch(input_file_id):
-    """Create a batch using the uploaded file ID."""
-    response = client.batches.create(
-        input_file_id=input_file_id,
-        endpoint="/v1/chat/completions",
-        completion_window="24h",
-    )
-    if "id" not in response:
-        raise Exception(f"Batch creation failed: {response}")
-    return response
-
-
-def process_video_batch(video_path, jsonl_filename, seconds_per_frame=0.5, max_frames=100):
-    """Main function to process a video and queue a batch."""
-    validate_video_path(video_path)
-    frames = extract_frames(video_path, seconds_per_frame, max_frames)
-    jsonl_data = prepare_jsonl_from_frames(frames)
-    input_file_id = upload_jsonl(jsonl_data, jsonl_filename)
-    batch_info = create_batch(input_file_id)
-
-    return batch_info
+import os
+from openai import OpenAI
+from frame_source import iter_frames
+from hud_dedup import make_deduplicator, iter_batches
+from segment_parallel import iter_segment_frames
+from hud_layout import iter_hud_crops
+from batch_jsonl import ShardedJsonlWriter
+from frame_ring import iter_ring_frames, RING_CAPACITY
+from request_builder import build_request, batch_line, encode_frame
+from payload_encoder import PayloadEncoder
+
+# Model and client setup
+MODEL = "gpt-4o-2024-08-06"
+client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your_openai_api_key_here"))
+
+
+def validate_video_path(video_path):
+    """Validate if the video file exists and is readable."""
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+    if not os.access(video_path, os.R_OK):
+        raise PermissionError(f"Cannot read video file: {video_path}")
+    return True
+
+
+def iter_extracted_frames(video_path, seconds_per_frame=0.5, max_frames=100, backend="cv2", game=None,
+                          hud_crop=False, segments=1):
+    """Yield (frame_index, timestamp_ms, frame) for the sampled frames (or only their HUD strips)."""
+    if segments > 1:
+        # Decode keyframe-aligned ranges in a process pool, merged back in timestamp order
+        frames = iter_segment_frames(video_path, seconds_per_frame, segments, max_frames, game, hud_crop)
+    else:
+        frames = iter_frames(video_path, seconds_per_frame, max_frames=max_frames, backend=backend)
+        if hud_crop:
+            frames = iter_hud_crops(frames, game)
+    return frames
+
+
+def extract_frames(video_path, seconds_per_frame=0.5, max_frames=100, backend="cv2", game=None, hud_crop=False,
+                   segments=1):
+    """
+    Extract frames (or only their HUD strips) from the video at regular intervals.
+
+    Keeps every frame in memory; process_video_batch streams them through a FrameRing instead.
+    """
+    print(f"Extracting frames from video: {video_path}...")
+    extracted_frames = [frame for _, _, frame in iter_extracted_frames(video_path, seconds_per_frame, max_frames,
+                                                                        backend, game, hud_crop, segments)]
+    print(f"Extracted {len(extracted_frames)} frames from video.")
+    return extracted_frames
+
+
+def build_batch_request(custom_id, images, hud_cropped=False):
+    """Build one Batch API request line for a batch of encoded frames (JPEG bytes or image parts)."""
+    return batch_line(custom_id, build_request(images, MODEL, hud_cropped=hud_cropped))
+
+
+def iter_encoded_frames(frames, deduplicator=None, ring_capacity=RING_CAPACITY, frame_size=None, encoder=None):
+    """
+    Dedup and JPEG-encode frames one at a time as they come out of a FrameRing.
+
+    Decoding fills the ring on its own thread and each slot is released as soon as its
+    frame has been hashed and encoded, so no more than ring_capacity decoded frames
+    exist at once. frame_size (width, height) downscales frames as they enter the ring.
+    Yields (frame_index, timestamp_ms, image or None, duplicate); the image is JPEG bytes,
+    or an image part sized to its budget by encoder (a PayloadEncoder).
+    """
+    shape = (frame_size[1], frame_size[0], 3) if frame_size else None
+    encode = encoder.part if encoder is not None else encode_frame
+    for frame_index, timestamp_ms, frame in iter_ring_frames(frames, ring_capacity, shape):
+        duplicate = deduplicator is not None and deduplicator.is_duplicate(frame)
+        yield frame_index, timestamp_ms, None if duplicate else encode(frame), duplicate
+
+
+def write_jsonl_from_frames(frames, writer, video_path=None, deduplicator=None, hud_cropped=False, batch_size=10,
+                            ring_capacity=RING_CAPACITY, frame_size=None, encoder=None):
+    """
+    Stream Batch API requests for (frame_index, timestamp_ms, frame) tuples in batches of batch_size.
+
+    Frames whose HUD did not change are not sent; the manifest lists them with duplicate=True
+    so they can reuse the previous result (a batch of nothing but duplicates gets a manifest
+    entry without a request). Frames pass through iter_encoded_frames, so only their JPEG
+    bytes are held while a batch fills. Returns the number of requests written.
+    """
+    written = 0
+    entries = iter_encoded_frames(frames, deduplicator, ring_capacity, frame_size, encoder)
+
+    for batch_idx, batch in enumerate(iter_batches(entries, batch_size)):
+        batch_images = [entry[2] for entry in batch if not entry[3]]
+        covered = [{"frame_index": frame_index, "timestamp_ms": timestamp_ms, "duplicate": duplicate}
+                  for frame_index, timestamp_ms, _, duplicate in batch]
+        if not batch_images:
+            # Only the trailing duplicates of a video end up here; they still need their rows
+            writer.write_frames(video_path, covered)
+            continue
+
+        writer.write(build_batch_request(f"batch-{batch_idx}", batch_images, hud_cropped), video=video_path,
+                     frames=covered)
+        written += 1
+
+    return written
+
+
+def upload_jsonl(filename):
+    """Upload a JSONL file to OpenAI and return its file ID."""
+    with open(filename, "rb") as file:
+        response = client.files.create(file=file, purpose="batch")
+
+    if not getattr(response, "id", None):
+        raise Exception(f"File upload failed: {response}")
+    return response.id
+
+
+def create_batch(input_file_id):
+    """Create a batch using the uploaded file ID."""
+    response = client.batches.create(
+        input_file_id=input_file_id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    if not getattr(response, "id", None):
+        raise Exception(f"Batch creation failed: {response}")
+    return response
+
+
+def process_video_batch(video_path, jsonl_filename, seconds_per_frame=0.5, max_frames=100, backend="cv2",
+                        dedup_threshold=None, game=None, hud_crop=False, segments=1, manager=None, batch_size=10,
+                        ring_capacity=RING_CAPACITY, frame_size=None, payload_bytes=None):
+    """
+    Main function to process a video and queue its batches.
+
+    Requests are streamed into shards named after jsonl_filename (one batch per shard) with
+    a manifest next to them. Returns {"batches": [...], "manifest": path}. With a
+    BatchManager the batches are tracked so their results can be polled and collected.
+    Decoded frames go through a FrameRing of ring_capacity slots (optionally downscaled to
+    frame_size), which keeps memory flat whatever the video length or max_frames.
+    With payload_bytes every image is fitted to that many bytes by a PayloadEncoder.
+    """
+    validate_video_path(video_path)
+    deduplicator = make_deduplicator(dedup_threshold, game, hud_crop)
+    encoder = PayloadEncoder(max_bytes=payload_bytes) if payload_bytes else None
+    frames = iter_extracted_frames(video_path, seconds_per_frame, max_frames, backend, game, hud_crop, segments)
+
+    directory = os.path.dirname(jsonl_filename) or "."
+    prefix = os.path.splitext(os.path.basename(jsonl_filename))[0]
+    with ShardedJsonlWriter(directory, prefix=prefix) as writer:
+        written = write_jsonl_from_frames(frames, writer, video_path, deduplicator, hud_crop, batch_size,
+                                          ring_capacity, frame_size, encoder)
+    print(f"Wrote {written} requests to {len(writer.shards)} shard(s).")
+    if deduplicator:
+        deduplicator.report(video_path)
+    if encoder is not None:
+        encoder.report(video_path)
+
+    batches = [create_batch(upload_jsonl(shard)) for shard in writer.shards]
+    if manager is not None:
+        for batch in batches:
+            manager.track(batch, video=video_path, manifest=writer.manifest_path)
+    return {"batches": batches, "manifest": writer.manifest_path}
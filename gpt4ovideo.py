@@ -1,165 +1,454 @@
-import cv2
-import pandas as pd
-import time
-import json
-import base64
-from openai import OpenAI
-import os
-from tqdm import tqdm
-
-# Setup OpenAI client
-MODEL = "gpt-4o-2024-08-06"
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", None))
-
-
-def encode_image(image):
-    _, buffer = cv2.imencode('.jpg', image)
-    return base64.b64encode(buffer).decode('utf-8')
-
-
-def process_frames(frames, timestamps):
-    base64_images = [encode_image(frame) for frame in frames]
-
-    images_payload = []
-    for base64_image in base64_images:
-        images_payload.append({
-            "type": "image_url",
-            "image_url": {
-                "url": f"data:image/png;base64,{base64_image}",
-                "detail": "low"
-            }
-        })
-
-    response = client.chat.completions.create(
-        model=MODEL,
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "game_data",
-                "schema": {
-                    "type": "object",
-                    "properties": {
-                        "images": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "Game name": {"type": "string"},
-                                    "Credit": {"type": "string"},
-                                    "Bet": {"type": "string"},
-                                    "Win": {"type": "string"},
-                                    "Total Win": {"type": "string"},
-                                    "Free spins left": {"type": "string"},
-                                    "Auto spins": {"type": "string"},
-                                    "Feature": {"type": "boolean"}
-                                },
-                                "required": [
-                                    "Game name",
-                                    "Credit",
-                                    "Bet",
-                                    "Win",
-                                    "Total Win",
-                                    "Free spins left",
-                                    "Auto spins",
-                                    "Feature"
-                                ],
-                                "additionalProperties": False
-                            }
-                        }
-                    },
-                    "required": ["images"],
-                    "additionalProperties": False
-                },
-                "strict": True
-            }
-        },
-        messages=[
-            {"role": "system",
-             "content": "You are a structured robot that outputs results from gambling frames in a strict format."},
-            {"role": "user", "content": [
-                {"type": "text",
-                 "text": "Find and fill these columns with the correct values from the game HUD: "
-                         "Game name, Credit, Bet, Win, Total Win, Free spins left, Auto spins and Feature (boolean). "
-                         "Differentiate between free spins left and auto spins. Feature=True means the bonus feature "
-                         "is active. Usually, the feature comes with free spins left. If Feature=False, it MIGHT have "
-                         "auto spins. Sometimes, synonyms are used instead of the expected words, i.e. balance or coins"
-                         "instead of credit, if you find such word, extract their value for the 'credit' column. This "
-                         "applies for all columns or for different languages. If something is not present in the image,"
-                         "pass 'Unknown' in the field. Include currency in the output. ALWAYS return output from ALL 10 images"},
-                *images_payload
-            ]}
-        ],
-        temperature=0.0,
-
-    )
-
-    outputs = response.choices[0].message.content.split(';')
-
-    return [(timestamp, output) for timestamp, output in zip(timestamps, outputs)]
-
-
-def extract_frames(video_path, seconds_per_frame=1, batch_size=10):
-    video = cv2.VideoCapture(video_path)
-    if not video.isOpened():
-        raise FileNotFoundError(f"Could not open video file: {video_path}")
-
-    fps = round(video.get(cv2.CAP_PROP_FPS))
-    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-    frames_to_skip = int(fps * seconds_per_frame)
-
-    current_frame = 0
-    batch_frames = []
-    batch_timestamps = []
-    df = pd.DataFrame()
-
-    print(f"Processing video: {video_path} with {total_frames} frames.")
-
-    while current_frame < total_frames - 1:
-        video.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
-        success, frame = video.read()
-        if not success:
-            print(f"Failed to read frame at position {current_frame}.")
-            break
-
-        timestamp = float(current_frame)/fps
-        batch_frames.append(frame)
-        batch_timestamps.append(timestamp)
-
-        if len(batch_frames) == batch_size:
-            batch_results = process_frames(batch_frames, batch_timestamps)
-            current_data = json.loads(batch_results[0][1])
-            current_df = pd.DataFrame(current_data["images"])
-            df = pd.concat([df, current_df], ignore_index=True)
-            batch_frames = []
-            batch_timestamps = []
-
-        current_frame += frames_to_skip
-
-    if batch_frames:
-        batch_results = process_frames(batch_frames, batch_timestamps)
-        current_data = json.loads(batch_results[0][1])
-        current_df = pd.DataFrame(current_data["images"])
-        df = pd.concat([df, current_df], ignore_index=True)
-
-    video.release()
-    print("Video processing complete.")
-    return df
-
-
-def process_video(video_path, excel_filename=None):
-    if not excel_filename:
-        clip_name = os.path.splitext(os.path.basename(video_path))[0]
-        excel_filename = f"output/{clip_name}_output.xlsx"
-    else:
-        excel_filename = f"output/{excel_filename}"
-
-    df = extract_frames(video_path)
-    df.to_excel(excel_filename, index=False)
-    print(f"Results saved to: {excel_filename}")
-    return df
-
-
-if __name__ == "__main__":
-    VIDEO_PATH = "data/demo_clip3.mp4"
-    df_video_results = process_video(VIDEO_PATH, excel_filename="output_results.xlsx")
-    print(df_video_results)
+import time
+from openai import OpenAI
+import os
+from tqdm import tqdm
+from frame_source import iter_frames, open_video, frame_interval_for
+from hud_dedup import make_deduplicator, iter_deduplicated_batches, fill_forward
+from segment_parallel import iter_segment_frames
+from hud_layout import iter_hud_crops
+from contextlib import nullcontext
+from pipeline import iter_pipelined, PipelineStats
+from async_inference import AsyncInferenceEngine
+from result_cache import cache_key, schema_version
+from job_queue import JobCancelled
+from checkpoint import CheckpointStore, run_key
+from batch_sizing import AdaptiveBatchSizer
+from result_sinks import ColumnarAccumulator, columns_from_schema, open_sink
+from hud_mosaic import pack_mosaic, results_by_tile
+from digit_reader import DigitReader
+from game_session import GameSession, GAME_FIELD
+from field_tracker import FieldChangeTracker, field_regions
+from payload_encoder import PayloadEncoder
+from result_validation import ResultValidator
+from request_builder import (ITEM_SCHEMA, RESPONSE_FORMAT, build_request as build_chat_request, encode_frame,
+                             parse_items, prompt_fingerprint, cached_tokens)
+
+# Setup OpenAI client
+MODEL = "gpt-4o-2024-08-06"
+client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", None))
+
+
+def new_usage_stats():
+    return {"requests": 0, "frames": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+
+def record_usage(usage_stats, response, frame_count):
+    """Accumulate the token usage of one response so tokens per frame can be compared across layouts."""
+    if usage_stats is None or response.usage is None:
+        return
+    usage_stats["requests"] += 1
+    usage_stats["frames"] += frame_count
+    usage_stats["prompt_tokens"] += response.usage.prompt_tokens
+    usage_stats["cached_tokens"] += cached_tokens(response.usage)
+    usage_stats["completion_tokens"] += response.usage.completion_tokens
+
+
+def report_usage(usage_stats, label="video"):
+    if not usage_stats or not usage_stats["frames"]:
+        return
+    frames = usage_stats["frames"]
+    print(f"Token usage for {label}: {usage_stats['requests']} requests, {frames} frames, "
+          f"{usage_stats['prompt_tokens'] / frames:.1f} prompt and "
+          f"{usage_stats['completion_tokens'] / frames:.1f} completion tokens per frame, "
+          f"{100 * usage_stats['cached_tokens'] / max(1, usage_stats['prompt_tokens']):.0f}% of prompt tokens cached.")
+
+
+def build_request(frames, hud_cropped=False, mosaic=False, fields=None, encoder=None):
+    """
+    Build the chat completion arguments for one batch of frames, optionally for a subset of the fields.
+
+    With a PayloadEncoder every image is fitted to its byte budget; otherwise frames are
+    sent as default-quality JPEG. A mosaic needs HUD crops: full frames shrunk into its
+    tiles leave the HUD digits unreadable.
+    """
+    if mosaic and not hud_cropped:
+        raise ValueError("mosaic requires hud_crop: full frames are unreadable once tiled into a mosaic.")
+    encode = encoder.part if encoder is not None else encode_frame
+    if mosaic:
+        # All frames share one low-detail image, answers come back keyed by tile index
+        return build_chat_request([encode(pack_mosaic(frames))], MODEL, count=len(frames),
+                                  hud_cropped=hud_cropped, mosaic=True, fields=fields)
+    return build_chat_request([encode(frame) for frame in frames], MODEL, hud_cropped=hud_cropped, fields=fields)
+
+
+def parse_results(response, count, mosaic=False):
+    """Return one result dict (or None) per frame from a model response."""
+    content = response.choices[0].message.content
+    if mosaic:
+        return results_by_tile(content, count)
+    return parse_items(content)
+
+
+def prepare_batch(batch, hud_cropped=False, mosaic=False, cache=None, reader=None, session=None, scenes=None,
+                  tracker=None, changes=None, encoder=None):
+    """
+    Look the frames of a batch up in the cache and build the request for the ones still missing.
+
+    With a DigitReader, cache misses whose numeric fields all read with enough confidence
+    are answered locally (job["local"]) and only the rest go to the model.
+    With a GameSession the request leaves out "Game name" when every frame sent belongs
+    to an already named scene; scenes (one per sent frame) come from
+    session.observe_batch and are computed here when not given.
+    With a FieldChangeTracker frames whose field regions all match their last queried
+    state need no request (job["unchanged"]), and the request only asks for the fields
+    that changed in the others; changes come from tracker.observe_batch like scenes.
+    Returns a job dict; job["request"] is None when nothing has to be sent.
+    """
+    frames = [entry[2] for entry in batch if not entry[3]]
+    if session is not None and scenes is None:
+        scenes = session.observe_batch(batch)
+    if tracker is not None and changes is None:
+        changes = tracker.observe_batch(batch)
+
+    if cache is not None:
+        prompt = prompt_fingerprint(hud_cropped, mosaic)
+        schema = schema_version(RESPONSE_FORMAT)
+        keys = [cache_key(frame, MODEL, prompt, schema) for frame in frames]
+        outputs = [cache.get(key) for key in keys]
+    else:
+        keys = [None] * len(frames)
+        outputs = [None] * len(frames)
+
+    missing = [i for i, output in enumerate(outputs) if output is None]
+    local = {}
+    if reader is not None:
+        for i in missing:
+            values, _ = reader.read(frames[i])
+            if values is not None:
+                local[i] = values
+        missing = [i for i in missing if i not in local]
+    unchanged = set()
+    if tracker is not None:
+        unchanged = {i for i in missing if not changes[i]}
+        missing = [i for i in missing if i not in unchanged]
+    fields = None
+    if session is not None and missing:
+        fields = session.fields_for([scenes[i] for i in missing])
+    if tracker is not None and missing:
+        fields = tracker.fields_for([changes[i] for i in missing], fields)
+    request = build_request([frames[i] for i in missing], hud_cropped, mosaic, fields, encoder) if missing else None
+    return {"batch": batch, "frames": frames, "keys": keys, "outputs": outputs, "missing": missing,
+            "local": local, "unchanged": unchanged, "mosaic": mosaic, "scenes": scenes, "fields": fields,
+            "request": request}
+
+
+def finish_batch(job, response, usage_stats=None, cache=None, reader=None, previous=None, session=None,
+                 tracker=None):
+    """
+    Merge a response into a prepared job and return one result per sent frame.
+
+    job["returned"] is set to the number of items the model answered with; unparsable
+    output counts as none, leaving those frames empty instead of failing the run.
+    With a reader, fresh model results teach it the glyphs, and locally read frames take
+    their non-numeric fields (Feature, ...) from the closest earlier result, starting
+    from previous. With a session, full answers name their scene and reduced ones get
+    the scene's name filled in. Partial answers (job["fields"]) and unchanged frames are
+    completed from the closest earlier result the same way, before anything is cached;
+    a frame left unanswered makes the tracker re-query every field.
+    """
+    outputs = job["outputs"]
+    if response is not None:
+        record_usage(usage_stats, response, len(job["missing"]))
+        try:
+            fresh = parse_results(response, len(job["missing"]), job["mosaic"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Could not parse response for {len(job['missing'])} frames: {e}")
+            fresh = []
+        job["returned"] = sum(1 for result in fresh if result is not None) if job["mosaic"] else len(fresh)
+        for i, result in zip(job["missing"], fresh):
+            if session is not None and result is not None:
+                if job["fields"] and GAME_FIELD not in job["fields"]:
+                    result = {GAME_FIELD: session.name(job["scenes"][i]), **result}
+                else:
+                    session.learn(job["scenes"][i], result)
+            if tracker is not None and result is None:
+                tracker.invalidate()
+            outputs[i] = result
+            if reader is not None and result is not None:
+                reader.learn(job["frames"][i], result)
+    if job["local"] or job["unchanged"] or job["fields"]:
+        context = previous
+        for i, output in enumerate(outputs):
+            if i in job["local"]:
+                game = session.name(job["scenes"][i]) if session is not None else None
+                outputs[i] = {**(context or {}), GAME_FIELD: game or reader.game, **job["local"][i]}
+            elif i in job["unchanged"]:
+                outputs[i] = dict(context) if context else None
+            elif job["fields"] and output is not None and i in job["missing"]:
+                outputs[i] = {**(context or {}), **output}
+            if outputs[i] is not None:
+                context = outputs[i]
+    if cache is not None and response is not None:
+        for i in job["missing"]:
+            if outputs[i] is not None:
+                cache.put(job["keys"][i], outputs[i])
+    return outputs
+
+
+def requery_failing(job, outputs, validator, previous=None, hud_cropped=False, usage_stats=None, cache=None,
+                    encoder=None, engine=None):
+    """
+    Validate the model answers of a finished job and re-ask about the frames that fail.
+
+    Failing frames are sent again with the full schema in requests of
+    validator.requery_batch_size frames, never the whole batch; the validator then picks
+    between each answer and its retry, judged against the row before it. With an
+    AsyncInferenceEngine that is running the main requests, re-queries go through it so
+    they count against the same RPM/TPM limits and back off on 429s.
+    """
+    # Mosaic answers are keyed by tile, so only the missing tiles are in doubt
+    count_ok = job["mosaic"] or job.get("returned", len(job["missing"])) == len(job["missing"])
+    failing = sorted(validator.failing(outputs, job["missing"], previous, count_ok))
+    for start in range(0, len(failing), validator.requery_batch_size):
+        chunk = failing[start:start + validator.requery_batch_size]
+        request = build_request([job["frames"][i] for i in chunk], hud_cropped, encoder=encoder)
+        if engine is not None:
+            response = engine.complete_threadsafe(request)
+        else:
+            response = client.chat.completions.create(**request)
+        record_usage(usage_stats, response, len(chunk))
+        try:
+            retries = parse_items(response.choices[0].message.content)
+        except (ValueError, KeyError, TypeError):
+            retries = []
+        if len(retries) != len(chunk):
+            retries = [None] * len(chunk)
+        for i, retry in zip(chunk, retries):
+            before = next((outputs[j] for j in range(i - 1, -1, -1) if outputs[j] is not None), previous)
+            outputs[i] = validator.resolve(outputs[i], retry, before)
+            if cache is not None and outputs[i] is not None:
+                cache.put(job["keys"][i], outputs[i])
+    return outputs
+
+
+def process_frames(frames, timestamps, hud_cropped=False, mosaic=False, usage_stats=None, cache=None, reader=None,
+                   session=None, tracker=None, previous=None, encoder=None, validator=None):
+    """Return a (timestamp, result) pair per frame, only calling the model for frames missing from the cache."""
+    job = prepare_batch([(None, None, frame, False) for frame in frames], hud_cropped, mosaic, cache, reader,
+                        session, tracker=tracker, encoder=encoder)
+    response = client.chat.completions.create(**job["request"]) if job["request"] else None
+    outputs = finish_batch(job, response, usage_stats, cache, reader, previous, session, tracker)
+    if validator is not None and response is not None:
+        outputs = requery_failing(job, outputs, validator, previous, hud_cropped, usage_stats, cache, encoder)
+    return [(timestamp, output) for timestamp, output in zip(timestamps, outputs)]
+
+
+def count_sampled_frames(video_path, seconds_per_frame=1):
+    """Number of frames iter_frames will yield for a video, used as the progress total."""
+    video, fps, total_frames = open_video(video_path)
+    video.release()
+    interval = frame_interval_for(fps, seconds_per_frame)
+    return (total_frames + interval - 1) // interval
+
+
+def extract_frames(video_path, seconds_per_frame=1, batch_size=10, backend="cv2", dedup_threshold=None,
+                   game=None, hud_crop=False, mosaic=False, cache=None, concurrency=1, pipeline=False,
+                   encode_workers=4, segments=1, progress=None, cancel=None, checkpoint=False, sink=None,
+                   adaptive_batching=False, digit_reader=False, game_session=False, field_tracking=False,
+                   payload_bytes=None, validate=False):
+    """
+    Sample, batch and send the frames of a video, returning one row per sampled frame.
+
+    With concurrency > 1 the batches are sent through the AsyncInferenceEngine, which keeps
+    that many requests in flight under the RPM/TPM limits; rows stay in timestamp order.
+    With pipeline=True decoding runs on its own thread and JPEG/base64 encoding on
+    encode_workers threads, connected to the inference stage by bounded queues.
+    With segments > 1 the video is split into keyframe-aligned ranges that are decoded
+    and cropped in a process pool, then merged back in timestamp order.
+    progress(frames_done, frames_total) is called after every batch; setting the cancel
+    event stops the run with JobCancelled before the next batch is handled.
+    With checkpoint=True every finished batch is appended to a CheckpointStore keyed by the
+    video fingerprint and sampling parameters; a re-run restores those rows and resumes
+    decoding after the last committed frame.
+    Rows are collected in a ColumnarAccumulator and, with a sink (see result_sinks), also
+    streamed out as each batch completes.
+    With adaptive_batching=True an AdaptiveBatchSizer, starting at batch_size, picks the
+    frames per request from measured latency, tokens per frame and item-count mismatches.
+    With digit_reader=True a DigitReader for the game reads the numeric fields of full
+    frames locally once it has learned the font from model answers; frames it is not
+    confident about still go to the model. It is skipped unless every numeric field has
+    its own box in the game's HUD layout.
+    With game_session=True a GameSession detects scene changes and only asks for the game
+    name until each scene is identified; other requests use the schema without it.
+    With field_tracking=True each field that has its own box in the game's HUD layout is
+    diffed on its own; requests only ask for the fields that changed (plus those without
+    a box) and the rest is carried forward from the previous row.
+    With payload_bytes a PayloadEncoder picks size, codec and quality per image to fit
+    that many bytes and reports the upload bytes per frame.
+    With validate=True a ResultValidator checks item counts, field types and the credit
+    and free-spin accounting between rows; only the failing frames are re-queried.
+    """
+    if mosaic and not hud_crop:
+        raise ValueError("mosaic requires hud_crop: full frames are unreadable once tiled into a mosaic.")
+    deduplicator = make_deduplicator(dedup_threshold, game, hud_crop)
+    usage_stats = new_usage_stats()
+    state = {"last_result": None, "done": 0}
+    rows_out = ColumnarAccumulator(name for name, _ in columns_from_schema(ITEM_SCHEMA))
+    frames_total = count_sampled_frames(video_path, seconds_per_frame) if progress else None
+    sizer = AdaptiveBatchSizer(initial=batch_size) if adaptive_batching else None
+    reader = None
+    if digit_reader:
+        if hud_crop:
+            print("Digit reader skipped: its field boxes refer to full frames, not HUD crops.")
+        else:
+            reader = DigitReader(game)
+            if reader.missing_boxes:
+                print(f"Digit reader skipped: the HUD layout of {game!r} has no box for "
+                      f"{', '.join(reader.missing_boxes)}.")
+                reader = None
+    session = GameSession(game) if game_session else None
+    tracker = None
+    if field_tracking:
+        regions = field_regions(game, hud_crop)
+        if regions:
+            tracker = FieldChangeTracker(regions)
+        else:
+            print(f"Field tracking skipped: the HUD layout of {game!r} has no per-field boxes.")
+    encoder = PayloadEncoder(max_bytes=payload_bytes) if payload_bytes else None
+    validator = ResultValidator() if validate else None
+
+    def emit(rows):
+        rows_out.append(rows)
+        if sink is not None:
+            sink.write(rows)
+
+    print(f"Processing video: {video_path}")
+
+    store = None
+    resume_after = -1
+    if checkpoint:
+        params = {"seconds_per_frame": seconds_per_frame, "batch_size": batch_size, "dedup_threshold": dedup_threshold,
+                  "game": game, "hud_crop": hud_crop, "mosaic": mosaic, "model": MODEL, "prompt": prompt_fingerprint(hud_crop, mosaic),
+                  "adaptive_batching": adaptive_batching, "digit_reader": bool(reader),
+                  "game_session": game_session, "field_tracking": bool(tracker),
+                  "payload_bytes": payload_bytes, "validate": validate}
+        store = CheckpointStore(run_key(video_path, params))
+        for record in store.load():
+            emit(record["rows"])
+            state["last_result"] = record["last_result"]
+            state["done"] += len(record["rows"])
+            resume_after = record["last_frame_index"]
+        if resume_after >= 0:
+            print(f"Resuming after frame {resume_after} ({state['done']} frames from checkpoint {store.path}).")
+
+    if segments > 1:
+        frames = iter_segment_frames(video_path, seconds_per_frame, segments, game=game, hud_crop=hud_crop)
+    elif backend == "cv2":
+        frames = iter_frames(video_path, seconds_per_frame, backend=backend, start_frame=resume_after + 1)
+    else:
+        frames = iter_frames(video_path, seconds_per_frame, backend=backend)
+    if resume_after >= 0 and (segments > 1 or backend != "cv2"):
+        frames = ((i, t, frame) for i, t, frame in frames if i > resume_after)
+    if hud_crop and segments <= 1:
+        frames = iter_hud_crops(frames, game)
+    batches = iter_deduplicated_batches(frames, sizer or batch_size, deduplicator)
+    # Scenes and field changes are assigned here, in stream order, before encode workers take batches out of order
+    batches = ((batch, session.observe_batch(batch) if session else None,
+                tracker.observe_batch(batch) if tracker else None) for batch in batches)
+
+    def prepare(item):
+        batch, scenes, changes = item
+        return prepare_batch(batch, hud_crop, mosaic, cache, reader, session, scenes, tracker, changes, encoder)
+
+    pipeline_stats = PipelineStats() if pipeline else None
+    if pipeline:
+        jobs = iter_pipelined(batches, prepare, workers=encode_workers, stats=pipeline_stats)
+    else:
+        jobs = (prepare(item) for item in batches)
+
+    engine = AsyncInferenceEngine(max_concurrency=concurrency) if concurrency > 1 else None
+
+    def handle(job, response):
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled(video_path)
+        batch = job["batch"]
+        results = finish_batch(job, response, usage_stats, cache, reader, state["last_result"], session, tracker)
+        if validator is not None and response is not None:
+            results = requery_failing(job, results, validator, state["last_result"], hud_crop, usage_stats, cache,
+                                      encoder, engine)
+        if sizer is not None and response is not None:
+            sizer.record(len(job["missing"]), job["returned"], job.get("latency"),
+                         response.usage.prompt_tokens if response.usage else None)
+        aligned, state["last_result"] = fill_forward(batch, results, state["last_result"])
+        rows = [{"Timestamp (s)": entry[1] / 1000.0, **result} for entry, result in zip(batch, aligned)]
+        emit(rows)
+        if store is not None:
+            store.append(batch[-1][0], rows, state["last_result"])
+        state["done"] += len(batch)
+        if progress is not None:
+            progress(state["done"], frames_total)
+
+    # The checkpoint is closed on errors and interrupts too, keeping every batch committed so far
+    try:
+        if engine is not None:
+            def handle_timed(job, response):
+                job["latency"] = engine.pop_latency(job["request"])
+                handle(job, response)
+
+            engine.run(((job, job["request"]) for job in jobs), on_result=handle_timed)
+            engine.report(video_path)
+        else:
+            inference_stats = pipeline_stats.stage("inference") if pipeline else None
+            for job in jobs:
+                with inference_stats.timed() if inference_stats else nullcontext():
+                    started = time.perf_counter()
+                    response = client.chat.completions.create(**job["request"]) if job["request"] else None
+                    job["latency"] = time.perf_counter() - started
+                    handle(job, response)
+    finally:
+        if store is not None:
+            store.close()
+    df = rows_out.to_frame()
+    if pipeline_stats:
+        pipeline_stats.report(video_path, workers={"encode": encode_workers})
+    if deduplicator:
+        deduplicator.report(video_path)
+    if sizer is not None:
+        sizer.report(video_path)
+    if reader is not None:
+        reader.save()
+        reader.report(video_path)
+    if session is not None:
+        session.report(video_path)
+    if tracker is not None:
+        tracker.report(video_path)
+    if encoder is not None:
+        encoder.report(video_path)
+    if validator is not None:
+        validator.report(video_path)
+    report_usage(usage_stats, video_path)
+    if cache is not None:
+        cache.report(video_path)
+    print("Video processing complete.")
+    return df
+
+
+def process_video(video_path, excel_filename=None, backend="cv2", dedup_threshold=None, game=None, hud_crop=False,
+                  mosaic=False, cache=None, concurrency=1, pipeline=False, segments=1, progress=None, cancel=None,
+                  checkpoint=False, adaptive_batching=False, digit_reader=False, game_session=False,
+                  field_tracking=False, payload_bytes=None, validate=False):
+    """Extract the HUD values of a video and stream them to excel_filename (.xlsx, .csv or .parquet)."""
+    if not excel_filename:
+        clip_name = os.path.splitext(os.path.basename(video_path))[0]
+        excel_filename = f"output/{clip_name}_output.xlsx"
+    else:
+        excel_filename = f"output/{excel_filename}"
+
+    sink = open_sink(excel_filename, columns_from_schema(ITEM_SCHEMA))
+    try:
+        df = extract_frames(video_path, backend=backend, dedup_threshold=dedup_threshold, game=game,
+                            hud_crop=hud_crop, mosaic=mosaic, cache=cache, concurrency=concurrency,
+                            pipeline=pipeline, segments=segments, progress=progress, cancel=cancel,
+                            checkpoint=checkpoint, sink=sink, adaptive_batching=adaptive_batching,
+                            digit_reader=digit_reader, game_session=game_session,
+                            field_tracking=field_tracking, payload_bytes=payload_bytes, validate=validate)
+    finally:
+        sink.close()
+    print(f"Results saved to: {excel_filename}")
+    return df
+
+
+if __name__ == "__main__":
+    VIDEO_PATH = "data/demo_clip3.mp4"
+    df_video_results = process_video(VIDEO_PATH, excel_filename="output_results.xlsx")
+    print(df_video_results)
@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+from hud_layout import get_layout, crop_hud
+
+# Token cost of one image sent with "detail": "low"
+LOW_DETAIL_IMAGE_TOKENS = 85
+# Changed pixels (after noise filtering) a HUD may show and still count as a duplicate;
+# a single changed digit changes several hundred at HUD_SIGNATURE_WIDTH
+DEDUP_THRESHOLD = 64
+# HUD crops are compared at this width, which keeps the strokes of single digits several pixels wide
+HUD_SIGNATURE_WIDTH = 1280
+
+
+def hud_signature(image, width=HUD_SIGNATURE_WIDTH):
+    """Greyscale copy of a HUD image scaled to width, so changed-pixel counts do not depend on the video size."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    if gray.shape[1] == width:
+        return gray
+    height = max(1, int(round(gray.shape[0] * width / gray.shape[1])))
+    interpolation = cv2.INTER_AREA if gray.shape[1] > width else cv2.INTER_LINEAR
+    return cv2.resize(gray, (width, height), interpolation=interpolation)
+
+
+def changed_pixels(signature_a, signature_b, pixel_threshold=25):
+    """
+    Number of pixels whose grey level changed by more than pixel_threshold.
+
+    Only pixels inside a changed 2x2 block count, so isolated compression noise drops out
+    while the strokes of a changed digit remain.
+    """
+    if signature_a.shape != signature_b.shape:
+        return signature_a.size
+    changed = (cv2.absdiff(signature_a, signature_b) > pixel_threshold).astype(np.uint8)
+    return int(np.count_nonzero(cv2.erode(changed, np.ones((2, 2), np.uint8))))
+
+
+class HudDeduplicator:
+    """
+    Skip frames whose HUD is identical to the last frame that was sent to the model.
+
+    Only the HUD is compared: either the frames are already HUD crops (hud_cropped=True)
+    or boxes gives the game's layout boxes to crop them with. The greyscale HUD is scaled
+    to HUD_SIGNATURE_WIDTH pixels wide and diffed against the last one sent; threshold is
+    the number of changed pixels tolerated, well below what one changed digit produces.
+    (A perceptual hash is too coarse here: it maps a one-digit change to the same hash.)
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, boxes=None, hud_cropped=False):
+        if not boxes and not hud_cropped:
+            raise ValueError("HudDeduplicator only compares the HUD: pass the layout boxes, "
+                             "or hud_cropped=True for frames that are already HUD crops.")
+        self.threshold = threshold
+        self.boxes = boxes
+        self.last_signature = None
+        self.frames_seen = 0
+        self.frames_skipped = 0
+
+    def signature(self, frame):
+        if self.boxes:
+            frame = crop_hud(frame, self.boxes)
+        return hud_signature(frame)
+
+    def distance(self, signature_a, signature_b):
+        return changed_pixels(signature_a, signature_b)
+
+    def is_duplicate(self, frame):
+        """Return True if the frame can reuse the previous result, otherwise remember it as sent."""
+        self.frames_seen += 1
+        signature = self.signature(frame)
+        if self.last_signature is not None and self.distance(signature, self.last_signature) <= self.threshold:
+            self.frames_skipped += 1
+            return True
+        self.last_signature = signature
+        return False
+
+    def tokens_saved(self, tokens_per_image=LOW_DETAIL_IMAGE_TOKENS):
+        return self.frames_skipped * tokens_per_image
+
+    def report(self, label="video", tokens_per_image=LOW_DETAIL_IMAGE_TOKENS):
+        """Print and return how many frames and image tokens the dedup stage saved."""
+        stats = {
+            "frames_seen": self.frames_seen,
+            "frames_skipped": self.frames_skipped,
+            "tokens_saved": self.tokens_saved(tokens_per_image),
+        }
+        share = 100.0 * self.frames_skipped / self.frames_seen if self.frames_seen else 0.0
+        print(f"Dedup for {label}: skipped {self.frames_skipped}/{self.frames_seen} frames ({share:.1f}%), "
+              f"~{stats['tokens_saved']} image tokens saved.")
+        return stats
+
+
+def make_deduplicator(threshold, game=None, hud_cropped=False):
+    """HudDeduplicator for a run, or None when dedup is off or there is no HUD to compare."""
+    if threshold is None:
+        return None
+    if hud_cropped:
+        return HudDeduplicator(threshold, hud_cropped=True)
+    boxes = get_layout(game)
+    if not boxes:
+        print(f"Dedup skipped: no HUD layout registered for {game!r}, use hud_crop to detect one.")
+        return None
+    return HudDeduplicator(threshold, boxes=boxes)
+
+
+def iter_deduplicated_batches(frames, batch_size, deduplicator=None):
+    """
+    Group (frame_index, timestamp_ms, frame) tuples into batches of batch_size frames to send.
+
+    Each batch is a list of (frame_index, timestamp_ms, frame, duplicate) entries in
+    video order; duplicates ride along with the batch so their timestamps are kept.
+    batch_size may be a callable (e.g. an AdaptiveBatchSizer), asked again for every batch.
+    """
+    entries = ((frame_index, timestamp_ms, frame, deduplicator is not None and deduplicator.is_duplicate(frame))
+               for frame_index, timestamp_ms, frame in frames)
+    return iter_batches(entries, batch_size)
+
+
+def iter_batches(entries, batch_size):
+    """Group already flagged (frame_index, timestamp_ms, frame, duplicate) entries like iter_deduplicated_batches."""
+    batch = []
+    to_send = 0
+    for entry in entries:
+        duplicate = entry[3]
+        batch.append(entry)
+        if not duplicate:
+            to_send += 1
+        if to_send >= (batch_size() if callable(batch_size) else batch_size):
+            yield batch
+            batch = []
+            to_send = 0
+    if batch:
+        yield batch
+
+
+def fill_forward(entries, results, previous=None):
+    """
+    Align model results with batch entries.
+
+    Sent frames take the next result in order, duplicates copy the last result seen
+    (which may come from the previous batch). Returns (aligned results, last result).
+    """
+    results = iter(results)
+    aligned = []
+    for entry in entries:
+        if not entry[3]:
+            previous = next(results, None)
+        aligned.append(dict(previous) if previous else {})
+    return aligned, previous
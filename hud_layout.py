@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import zipfile
+import itertools
+import cv2
+import numpy as np
+
+HUD_LAYOUTS_PATH = "hud_layouts.json"
+DETECTION_FRAMES = 10
+HUD_CROP_NOTE = ("Each image only contains the HUD strips of one frame, cropped from the game "
+                 "and stacked vertically.")
+
+
+def _game_key(game):
+    return game.strip().lower()
+
+
+def load_layouts(path=HUD_LAYOUTS_PATH):
+    """Load the per-game HUD layout registry: {game: [{"label": str, "box": [xc, yc, w, h]}]}."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def save_layouts(layouts, path=HUD_LAYOUTS_PATH):
+    with open(path, "w") as file:
+        json.dump(layouts, file, indent=2, sort_keys=True)
+
+
+def get_layout(game, path=HUD_LAYOUTS_PATH):
+    """Return the registered HUD boxes of a game, or None if the game is unknown."""
+    if not game:
+        return None
+    return load_layouts(path).get(_game_key(game))
+
+
+def register_layout(game, boxes, path=HUD_LAYOUTS_PATH):
+    layouts = load_layouts(path)
+    layouts[_game_key(game)] = boxes
+    save_layouts(layouts, path)
+    return boxes
+
+
+def _read_yolo_export(export_path):
+    """Return (class names, list of label file contents) from a YOLO export zip or directory."""
+    if zipfile.is_zipfile(export_path):
+        with zipfile.ZipFile(export_path) as archive:
+            names = archive.namelist()
+            classes = [n for n in names if os.path.basename(n) == "classes.txt"]
+            if not classes:
+                raise ValueError(f"No classes.txt found in YOLO export: {export_path}")
+            class_names = archive.read(classes[0]).decode("utf-8").split()
+            labels = [archive.read(n).decode("utf-8") for n in names
+                      if n.endswith(".txt") and "/labels/" in f"/{n}"]
+        return class_names, labels
+
+    with open(os.path.join(export_path, "classes.txt"), "r") as file:
+        class_names = file.read().split()
+    labels_dir = os.path.join(export_path, "labels")
+    labels = []
+    for name in sorted(os.listdir(labels_dir)):
+        if name.endswith(".txt"):
+            with open(os.path.join(labels_dir, name), "r") as file:
+                labels.append(file.read())
+    return class_names, labels
+
+
+def load_yolo_export(export_path):
+    """
+    Read HUD boxes from the YOLO export written by export_data_labelstudio.py.
+
+    The HUD does not move within a game, so every labelled instance of a class is merged
+    into one box (the union over all frames), keeping the strip stable across frames.
+    """
+    class_names, labels = _read_yolo_export(export_path)
+    extents = {}
+    for content in labels:
+        for line in content.splitlines():
+            parts = line.split()
+            if len(parts) != 5:
+                continue
+            class_id = int(parts[0])
+            xc, yc, w, h = (float(value) for value in parts[1:])
+            box = (xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2)
+            current = extents.get(class_id, box)
+            extents[class_id] = (min(current[0], box[0]), min(current[1], box[1]),
+                                 max(current[2], box[2]), max(current[3], box[3]))
+
+    boxes = []
+    for class_id, (x0, y0, x1, y1) in sorted(extents.items()):
+        label = class_names[class_id] if class_id < len(class_names) else f"class_{class_id}"
+        boxes.append({"label": label, "box": [(x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0]})
+    return boxes
+
+
+def _runs(mask, min_length, max_gap):
+    """Return (start, end) index pairs of True runs, bridging gaps up to max_gap."""
+    runs = []
+    start = None
+    gap = 0
+    for i, value in enumerate(mask):
+        if value:
+            if start is None:
+                start = i
+            gap = 0
+            end = i + 1
+        elif start is not None:
+            gap += 1
+            if gap > max_gap:
+                runs.append((start, end))
+                start = None
+    if start is not None:
+        runs.append((start, end))
+    return [(a, b) for a, b in runs if b - a >= min_length]
+
+
+def detect_hud_boxes(frames, edge_band=0.35, density_threshold=0.04, motion_threshold=12.0, margin=0.01):
+    """
+    Guess the HUD boxes from the first frames of a session.
+
+    HUD text is edge-dense and stays put while the reels move, so pixels that carry
+    edges in most frames and have a low temporal deviation are scored as HUD. Horizontal
+    bars are searched in the top/bottom edge_band of the frame, side panels in the
+    left/right edge_band. Returns boxes in the registry (YOLO) format.
+    """
+    if not frames:
+        return []
+    grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+    height, width = grays[0].shape
+    edges = np.mean([cv2.Canny(gray, 100, 200) > 0 for gray in grays], axis=0)
+    if len(grays) > 1:
+        motion = np.std(np.stack(grays).astype(np.float32), axis=0)
+        hud_score = edges * (motion < motion_threshold)
+    else:
+        hud_score = edges
+
+    boxes = []
+
+    def add_box(x0, y0, x1, y1, label):
+        x0 = max(0.0, x0 / width - margin)
+        y0 = max(0.0, y0 / height - margin)
+        x1 = min(1.0, x1 / width + margin)
+        y1 = min(1.0, y1 / height + margin)
+        boxes.append({"label": label, "box": [(x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0]})
+
+    rows = hud_score.mean(axis=1) > density_threshold
+    band_rows = int(height * edge_band)
+    rows[band_rows:height - band_rows] = False
+    for y0, y1 in _runs(rows, max(2, height // 50), max(1, height // 100)):
+        columns = np.nonzero(hud_score[y0:y1].mean(axis=0) > density_threshold / 4)[0]
+        if columns.size:
+            add_box(columns[0], y0, columns[-1] + 1, y1, f"bar_{len(boxes)}")
+        hud_score[y0:y1] = 0
+
+    columns = hud_score.mean(axis=0) > density_threshold
+    band_columns = int(width * edge_band)
+    columns[band_columns:width - band_columns] = False
+    for x0, x1 in _runs(columns, max(2, width // 50), max(1, width // 100)):
+        rows = np.nonzero(hud_score[:, x0:x1].mean(axis=1) > density_threshold / 4)[0]
+        if rows.size:
+            add_box(x0, rows[0], x1, rows[-1] + 1, f"panel_{len(boxes)}")
+
+    return boxes
+
+
+def to_pixel_box(box, width, height):
+    """Convert a normalised (xc, yc, w, h) box into pixel (x, y, w, h)."""
+    xc, yc, w, h = box
+    x0 = max(0, int(round((xc - w / 2) * width)))
+    y0 = max(0, int(round((yc - h / 2) * height)))
+    x1 = min(width, int(round((xc + w / 2) * width)))
+    y1 = min(height, int(round((yc + h / 2) * height)))
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def crop_hud(frame, boxes):
+    """Cut the HUD boxes out of a frame and stack the strips vertically into one image."""
+    height, width = frame.shape[:2]
+    strips = []
+    for entry in boxes:
+        x, y, w, h = to_pixel_box(entry["box"], width, height)
+        if w > 0 and h > 0:
+            strips.append(frame[y:y + h, x:x + w])
+    if not strips:
+        return frame
+
+    out_width = max(strip.shape[1] for strip in strips)
+    out = np.zeros((sum(strip.shape[0] for strip in strips), out_width, 3), dtype=frame.dtype)
+    y = 0
+    for strip in strips:
+        out[y:y + strip.shape[0], :strip.shape[1]] = strip
+        y += strip.shape[0]
+    return out
+
+
+def hud_crop_boxes(boxes):
+    """
+    The layout boxes as crop_hud stacks them, normalised to the crop instead of the frame.
+
+    Strip heights add up and widths are left-aligned against the widest strip, so the
+    position of each box inside a crop does not depend on the frame size.
+    """
+    boxes = [entry for entry in boxes if entry["box"][2] > 0 and entry["box"][3] > 0]
+    total_height = sum(entry["box"][3] for entry in boxes)
+    max_width = max((entry["box"][2] for entry in boxes), default=0)
+    stacked = []
+    y = 0.0
+    for entry in boxes:
+        w, h = entry["box"][2] / max_width, entry["box"][3] / total_height
+        stacked.append({"label": entry["label"], "box": [w / 2, y + h / 2, w, h]})
+        y += h
+    return stacked
+
+
+def label_key(label):
+    return label.replace("_", " ").replace("-", " ").strip().lower()
+
+
+def boxes_by_field(boxes, fields):
+    """{field: box} for the fields that have their own labelled box (labels match case- and separator-insensitively)."""
+    by_label = {label_key(entry["label"]): entry["box"] for entry in boxes or []}
+    return {field: by_label[label_key(field)] for field in fields if label_key(field) in by_label}
+
+
+def resolve_hud_boxes(frames, game=None, layouts_path=HUD_LAYOUTS_PATH, detection_frames=DETECTION_FRAMES):
+    """
+    Return (boxes, head) for a (frame_index, timestamp_ms, frame) iterator.
+
+    The layout comes from the registry when the game is known, otherwise it is detected
+    once from the first detection_frames frames, which are returned as head so the
+    caller can still use them.
+    """
+    boxes = get_layout(game, layouts_path)
+    head = []
+    if not boxes:
+        head = list(itertools.islice(frames, detection_frames))
+        boxes = detect_hud_boxes([frame for _, _, frame in head])
+        print(f"Detected {len(boxes)} HUD region(s) from the first {len(head)} frames.")
+    return boxes, head
+
+
+def iter_hud_crops(frames, game=None, layouts_path=HUD_LAYOUTS_PATH, detection_frames=DETECTION_FRAMES):
+    """
+    Wrap a (frame_index, timestamp_ms, frame) iterator and yield HUD crops instead of full frames.
+
+    Frames pass through uncropped if no HUD can be found.
+    """
+    frames = iter(frames)
+    boxes, head = resolve_hud_boxes(frames, game, layouts_path, detection_frames)
+    for frame_index, timestamp_ms, frame in itertools.chain(head, frames):
+        yield frame_index, timestamp_ms, crop_hud(frame, boxes) if boxes else frame
+
+
+if __name__ == "__main__":
+    # Usage: python hud_layout.py "<game name>" exported_data.zip
+    if len(sys.argv) != 3:
+        print('Usage: python hud_layout.py "<game name>" <YOLO export zip or directory>')
+        sys.exit(1)
+    registered = register_layout(sys.argv[1], load_yolo_export(sys.argv[2]))
+    print(f"Registered {len(registered)} HUD box(es) for {sys.argv[1]} in {HUD_LAYOUTS_PATH}.")
@@ -0,0 +1,114 @@
+import json
+import math
+import cv2
+import numpy as np
+
+TILE_SIZE = 512
+LOW_DETAIL_SIZE = (512, 512)
+LABEL_HEIGHT = 18
+TILE_KEY = "Tile"
+
+
+def fit_high_detail(width, height):
+    """Size an image is resized to before high-detail tiling (fit 2048x2048, then shortest side 768)."""
+    scale = min(1.0, 2048.0 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768.0 / min(width, height))
+    return int(width * scale), int(height * scale)
+
+
+def image_tokens(width, height, detail="low"):
+    """Image input tokens of one image: 85 for low detail, 85 + 170 per 512px tile for high detail."""
+    if detail == "low":
+        return 85
+    width, height = fit_high_detail(width, height)
+    return 85 + 170 * math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+
+
+def mosaic_canvas(detail="low", tiles=(1, 1)):
+    """Largest canvas that costs a single low-detail image or the given (columns, rows) of high-detail tiles."""
+    if detail == "low":
+        return LOW_DETAIL_SIZE
+    return fit_high_detail(TILE_SIZE * tiles[0], TILE_SIZE * tiles[1])
+
+
+def pack_mosaic(crops, detail="low", tiles=(1, 1)):
+    """
+    Tile HUD crops into one labelled grid image that fits the canvas of the given detail budget.
+
+    Every cell gets a label band with its tile index burned in, so the model can key its
+    answers by tile. The column count is chosen to keep the crops as large as possible.
+    """
+    canvas_width, canvas_height = mosaic_canvas(detail, tiles)
+    crop_height = max(crop.shape[0] for crop in crops)
+    crop_width = max(crop.shape[1] for crop in crops)
+
+    best = None
+    for columns in range(1, len(crops) + 1):
+        rows = math.ceil(len(crops) / columns)
+        scale = min(canvas_width / (columns * crop_width),
+                    (canvas_height - rows * LABEL_HEIGHT) / (rows * crop_height))
+        if best is None or scale > best[0]:
+            best = (scale, columns, rows)
+    scale, columns, rows = best
+    if scale <= 0:
+        raise ValueError(f"{len(crops)} crops do not fit into a {canvas_width}x{canvas_height} mosaic.")
+
+    cell_width = max(1, int(crop_width * scale))
+    strip_height = max(1, int(crop_height * scale))
+    cell_height = strip_height + LABEL_HEIGHT
+    mosaic = np.zeros((rows * cell_height, columns * cell_width, 3), dtype=np.uint8)
+
+    for tile, crop in enumerate(crops):
+        x = (tile % columns) * cell_width
+        y = (tile // columns) * cell_height
+        cv2.putText(mosaic, f"{TILE_KEY} {tile}", (x + 2, y + LABEL_HEIGHT - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1, cv2.LINE_AA)
+        strip = cv2.resize(crop, (max(1, int(crop.shape[1] * scale)), max(1, int(crop.shape[0] * scale))),
+                           interpolation=cv2.INTER_AREA)
+        strip = strip[:strip_height, :cell_width]
+        mosaic[y + LABEL_HEIGHT:y + LABEL_HEIGHT + strip.shape[0], x:x + strip.shape[1]] = strip
+    return mosaic
+
+
+def mosaic_response_format(item_schema, name="game_data_mosaic"):
+    """Wrap a per-frame item schema into a strict schema keyed by tile index."""
+    properties = {TILE_KEY: {"type": "integer"}, **item_schema["properties"]}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "tiles": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": properties,
+                            "required": [TILE_KEY, *item_schema["required"]],
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["tiles"],
+                "additionalProperties": False
+            },
+            "strict": True
+        }
+    }
+
+
+def mosaic_instructions(count):
+    return (f"The image is a grid of {count} labelled tiles ({TILE_KEY} 0 to {TILE_KEY} {count - 1}), "
+            f"each tile is the HUD of one frame. Return one item per tile with its {TILE_KEY} number.")
+
+
+def results_by_tile(content, count):
+    """Parse a mosaic response into one result per tile, in tile order (None for missing tiles)."""
+    results = [None] * count
+    for item in json.loads(content)["tiles"]:
+        tile = item.pop(TILE_KEY, None)
+        if isinstance(tile, int) and 0 <= tile < count and results[tile] is None:
+            results[tile] = item
+    return results
@@ -1,39 +1,68 @@
-import requests
-import os
-
-# Set the API endpoint and headers
-API_URL = "http://127.0.0.1:5000/queue_video"
-HEADERS = {
-    "Content-Type": "application/json"
-}
-
-
-def infer_queue_video(video_path, output_path=None):
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Video file not found: {video_path}")
-
-    payload = {"video_path": video_path}
-    if output_path:
-        payload["output"] = output_path
-
-    response = requests.post(API_URL, headers=HEADERS, json=payload)
-
-    if response.status_code == 200:
-        print("Request successful!")
-        return response.json()
-    else:
-        print(f"Error: {response.status_code}")
-        print(f"Details: {response.json()}")
-        response.raise_for_status()
-
-
-if __name__ == "__main__":
-    VIDEO_PATH = "data/demo_clip3.mp4"
-    OUTPUT_PATH = "demo_clip3_output.xlsx"
-
-    try:
-        result = infer_queue_video(VIDEO_PATH, OUTPUT_PATH)
-        print("Response from server:")
-        print(result)
-    except Exception as e:
-        print(f"An error occurred: {e}")
+import requests
+import os
+import time
+
+# Set the API endpoint and headers
+BASE_URL = "http://127.0.0.1:5000"
+API_URL = f"{BASE_URL}/queue_video"
+HEADERS = {
+    "Content-Type": "application/json"
+}
+POLL_SECONDS = 2
+
+
+def wait_for_job(job_id, poll_seconds=POLL_SECONDS, timeout=None):
+    """Poll /jobs/<id> until the job has finished, printing its progress; returns its last status."""
+    started = time.monotonic()
+    while True:
+        response = requests.get(f"{BASE_URL}/jobs/{job_id}")
+        response.raise_for_status()
+        status = response.json()
+        if status["status"] not in ("queued", "running"):
+            return status
+        print(f"Job {job_id} {status['status']}: "
+              f"{status.get('frames_done') or 0}/{status.get('frames_total') or '?'} frames")
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Job {job_id} did not finish within {timeout}s.")
+        time.sleep(poll_seconds)
+
+
+def infer_queue_video(video_path, output_path=None, poll_seconds=POLL_SECONDS, timeout=None):
+    """Queue a video, wait for the job and return its results."""
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+
+    payload = {"video_path": video_path}
+    if output_path:
+        payload["output"] = output_path
+
+    response = requests.post(API_URL, headers=HEADERS, json=payload)
+
+    if response.status_code != 202:
+        print(f"Error: {response.status_code}")
+        print(f"Details: {response.json()}")
+        response.raise_for_status()
+        raise RuntimeError(f"Unexpected response {response.status_code}: {response.json()}")
+
+    job_id = response.json()["job_id"]
+    print(f"Video queued as job {job_id}.")
+    status = wait_for_job(job_id, poll_seconds, timeout)
+    if status["status"] != "completed":
+        raise RuntimeError(f"Job {job_id} {status['status']}: {status.get('error')}")
+
+    response = requests.get(f"{BASE_URL}/jobs/{job_id}/results")
+    response.raise_for_status()
+    print("Request successful!")
+    return response.json()
+
+
+if __name__ == "__main__":
+    VIDEO_PATH = "data/demo_clip3.mp4"
+    OUTPUT_PATH = "demo_clip3_output.xlsx"
+
+    try:
+        result = infer_queue_video(VIDEO_PATH, OUTPUT_PATH)
+        print("Response from server:")
+        print(result)
+    except Exception as e:
+        print(f"An error occurred: {e}")
@@ -0,0 +1,103 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 2
+MAX_QUEUED_JOBS = 32
+MAX_FINISHED_JOBS = 256
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once its cancel event is set."""
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when too many jobs are already waiting."""
+
+
+class JobQueue:
+    """
+    Run long jobs on a bounded pool of background threads and keep their status.
+
+    submit() returns a job id straight away. The job function is called with progress and
+    cancel keyword arguments: progress(done, total) updates the job's progress and cancel
+    is a threading.Event it should check between units of work (raising JobCancelled).
+    At most max_queued jobs wait for a worker; the oldest finished jobs are forgotten
+    once more than max_finished are kept.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_queued=MAX_QUEUED_JOBS, max_finished=MAX_FINISHED_JOBS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def _run(self, job_id, func, kwargs):
+        job = self.jobs.get(job_id)
+        if job is None or job["cancel"].is_set():
+            return
+        self._update(job_id, status="running", started_at=time.time())
+
+        def progress(done, total=None):
+            self._update(job_id, frames_done=done, frames_total=total if total is not None else job["frames_total"])
+
+        try:
+            result = func(progress=progress, cancel=job["cancel"], **kwargs)
+        except JobCancelled:
+            self._update(job_id, status="cancelled", finished_at=time.time())
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+        else:
+            self._update(job_id, status="completed", result=result, finished_at=time.time())
+
+    def submit(self, func, **kwargs):
+        """Queue func(progress=..., cancel=..., **kwargs) and return the new job id."""
+        with self.lock:
+            queued = sum(1 for job in self.jobs.values() if job["status"] == "queued")
+            if queued >= self.max_queued:
+                raise QueueFull(f"{queued} jobs are already waiting.")
+            self._prune()
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {"id": job_id, "status": "queued", "submitted_at": time.time(), "started_at": None,
+                                 "finished_at": None, "frames_done": 0, "frames_total": None, "error": None,
+                                 "result": None, "cancel": threading.Event()}
+        self.pool.submit(self._run, job_id, func, kwargs)
+        return job_id
+
+    def status(self, job_id):
+        """Return the public fields of a job (everything but its result), or None if unknown."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if key not in ("result", "cancel")}
+
+    def result(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job["result"] if job else None
+
+    def cancel(self, job_id):
+        """Ask a job to stop; queued jobs never start, running jobs stop at their next check."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                return False
+            job["cancel"].set()
+            if job["status"] == "queued":
+                job["status"] = "cancelled"
+                job["finished_at"] = time.time()
+        return True
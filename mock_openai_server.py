@@ -0,0 +1,208 @@
+from flask import Flask, request, jsonify
+import os
+import json
+import time
+import uuid
+import threading
+
+# Local OpenAI-compatible stand-in for exercising the inference engines without spending tokens.
+# Point a client at it with base_url="http://127.0.0.1:5001/v1".
+LATENCY_SECONDS = float(os.environ.get("MOCK_LATENCY_SECONDS", "0.5"))
+RATE_LIMIT_EVERY = int(os.environ.get("MOCK_RATE_LIMIT_EVERY", "0"))
+# Fake Files/Batches API: batches finish after BATCH_SECONDS, every BATCH_ERROR_EVERY-th request fails
+BATCH_SECONDS = float(os.environ.get("MOCK_BATCH_SECONDS", "5"))
+BATCH_ERROR_EVERY = int(os.environ.get("MOCK_BATCH_ERROR_EVERY", "0"))
+
+app = Flask(__name__)
+counter_lock = threading.Lock()
+request_counter = {"count": 0}
+files = {}
+batches = {}
+seen_prefixes = set()
+
+MOCK_ITEM = {
+    "Game name": "Mock Slot",
+    "Credit": "100.00",
+    "Bet": "1.00",
+    "Win": "0.00",
+    "Total Win": "0.00",
+    "Free spins left": "Unknown",
+    "Auto spins": "Unknown",
+    "Feature": False
+}
+
+
+def mock_content(body):
+    """Build a response that satisfies the requested schema, one item per image (or per mosaic tile)."""
+    content = body["messages"][-1]["content"]
+    parts = content if isinstance(content, list) else []
+    images = sum(1 for part in parts if part.get("type") == "image_url")
+    schema = body.get("response_format", {}).get("json_schema", {}).get("schema", {})
+    properties = schema.get("properties", {})
+
+    if "tiles" in properties:
+        text = " ".join(part.get("text", "") for part in parts if part.get("type") == "text")
+        tiles = int(text.split("grid of ", 1)[1].split(" ", 1)[0]) if "grid of " in text else images
+        item_properties = properties["tiles"]["items"]["properties"]
+        items = [{key: MOCK_ITEM.get(key, tile) for key in item_properties} for tile in range(tiles)]
+        return json.dumps({"tiles": items})
+
+    for key, value in properties.items():
+        if value.get("type") == "array":
+            item_properties = value["items"]["properties"]
+            return json.dumps({key: [{k: MOCK_ITEM.get(k, "Unknown") for k in item_properties}] * images})
+    return json.dumps({key: MOCK_ITEM.get(key, "Unknown") for key in properties} or MOCK_ITEM)
+
+
+def mock_cached_tokens(body):
+    """Emulate prefix caching: a repeated system message + schema is cached in 128-token steps."""
+    prefix = json.dumps([body.get("response_format"), body["messages"][0]], sort_keys=True)
+    with counter_lock:
+        seen = prefix in seen_prefixes
+        seen_prefixes.add(prefix)
+    return (len(prefix) // 4 // 128) * 128 if seen else 0
+
+
+def mock_completion(body):
+    content = mock_content(body)
+    prompt_tokens = 85 * json.dumps(body).count('"image_url"') + 300
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": min(prompt_tokens, mock_cached_tokens(body))}
+        }
+    }
+
+
+@app.route('/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    with counter_lock:
+        request_counter["count"] += 1
+        count = request_counter["count"]
+
+    if RATE_LIMIT_EVERY and count % RATE_LIMIT_EVERY == 0:
+        response = jsonify({"error": {"message": "Rate limit reached (mock).", "type": "requests",
+                                      "code": "rate_limit_exceeded"}})
+        response.status_code = 429
+        response.headers["retry-after"] = "1"
+        response.headers["x-ratelimit-reset-requests"] = "1s"
+        return response
+
+    time.sleep(LATENCY_SECONDS)
+    response = jsonify(mock_completion(request.json))
+    response.headers["x-ratelimit-remaining-requests"] = "100"
+    response.headers["x-ratelimit-remaining-tokens"] = "100000"
+    return response
+
+
+def store_file(content, filename, purpose):
+    file_id = f"file-{uuid.uuid4().hex}"
+    files[file_id] = {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                      "filename": filename, "purpose": purpose, "status": "processed", "content": content}
+    return file_id
+
+
+def file_object(file_id):
+    return {key: value for key, value in files[file_id].items() if key != "content"}
+
+
+def run_batch(batch):
+    """Answer every request of a batch input file, splitting successes and failures into two files."""
+    time.sleep(BATCH_SECONDS)
+    output, errors = [], []
+    lines = [json.loads(line) for line in files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+             if line.strip()]
+    for number, line in enumerate(lines, 1):
+        if BATCH_ERROR_EVERY and number % BATCH_ERROR_EVERY == 0:
+            errors.append({"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": line["custom_id"], "response": {
+                "status_code": 500, "request_id": uuid.uuid4().hex,
+                "body": {"error": {"message": "Mock failure.", "type": "server_error"}}}, "error": None})
+            continue
+        output.append({"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": line["custom_id"], "response": {
+            "status_code": 200, "request_id": uuid.uuid4().hex, "body": mock_completion(line["body"])}, "error": None})
+
+    def to_file(items, name):
+        content = "".join(json.dumps(item) + "\n" for item in items).encode("utf-8")
+        return store_file(content, name, "batch_output") if items else None
+
+    batch.update({
+        "status": "completed",
+        "output_file_id": to_file(output, f"{batch['id']}_output.jsonl"),
+        "error_file_id": to_file(errors, f"{batch['id']}_errors.jsonl"),
+        "completed_at": int(time.time()),
+        "request_counts": {"total": len(lines), "completed": len(output), "failed": len(errors)}
+    })
+
+
+@app.route('/v1/files', methods=['POST'])
+def create_file():
+    upload = request.files["file"]
+    file_id = store_file(upload.read(), upload.filename, request.form.get("purpose", "batch"))
+    return jsonify(file_object(file_id))
+
+
+@app.route('/v1/files/<file_id>', methods=['GET'])
+def retrieve_file(file_id):
+    if file_id not in files:
+        return jsonify({"error": {"message": f"No such file: {file_id}"}}), 404
+    return jsonify(file_object(file_id))
+
+
+@app.route('/v1/files/<file_id>/content', methods=['GET'])
+def file_content(file_id):
+    if file_id not in files:
+        return jsonify({"error": {"message": f"No such file: {file_id}"}}), 404
+    return app.response_class(files[file_id]["content"], mimetype="application/jsonl")
+
+
+@app.route('/v1/batches', methods=['POST'])
+def create_batch():
+    body = request.json
+    if body.get("input_file_id") not in files:
+        return jsonify({"error": {"message": "Unknown input_file_id."}}), 400
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    batches[batch_id] = {
+        "id": batch_id, "object": "batch", "endpoint": body["endpoint"], "input_file_id": body["input_file_id"],
+        "completion_window": body.get("completion_window", "24h"), "status": "in_progress",
+        "created_at": int(time.time()), "output_file_id": None, "error_file_id": None,
+        "request_counts": {"total": 0, "completed": 0, "failed": 0}, "metadata": body.get("metadata")
+    }
+    threading.Thread(target=run_batch, args=(batches[batch_id],), daemon=True).start()
+    return jsonify(batches[batch_id])
+
+
+@app.route('/v1/batches/<batch_id>', methods=['GET'])
+def retrieve_batch(batch_id):
+    if batch_id not in batches:
+        return jsonify({"error": {"message": f"No such batch: {batch_id}"}}), 404
+    return jsonify(batches[batch_id])
+
+
+@app.route('/v1/batches', methods=['GET'])
+def list_batches():
+    """Newest first, paginated with limit/after like the real endpoint."""
+    ordered = sorted(batches.values(), key=lambda batch: batch["created_at"], reverse=True)
+    after = request.args.get("after")
+    if after:
+        ids = [batch["id"] for batch in ordered]
+        ordered = ordered[ids.index(after) + 1:] if after in ids else []
+    limit = int(request.args.get("limit", 20))
+    page = ordered[:limit]
+    return jsonify({"object": "list", "data": page, "first_id": page[0]["id"] if page else None,
+                    "last_id": page[-1]["id"] if page else None, "has_more": len(ordered) > limit})
+
+
+if __name__ == '__main__':
+    app.run(port=5001, threaded=True)
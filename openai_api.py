@@ -1,67 +1,173 @@
-from flask import Flask, request, jsonify
-from openai import OpenAI
-import os
-from gpt4ovideo import process_video
-from gpt4obatch import process_video_batch
-
-
-MODEL = "gpt-4o-2024-08-06"
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", None))
-
-app = Flask(__name__)
-
-
-@app.route('/queue_video', methods=['POST'])
-def queue_video():
-    try:
-        data = request.json
-        video_path = data.get('video_path')
-        if not video_path or not os.path.exists(video_path):
-            return jsonify({"error": "Invalid or missing 'video_path' parameter"}), 400
-
-        output = data.get('output')
-        if not output:
-            clip_name = os.path.splitext(os.path.basename(video_path))[0]
-            output = f"{clip_name}_output.xlsx"
-
-        results_df = process_video(video_path, excel_filename=output)
-        results_json = results_df.to_dict(orient="records")
-        return jsonify({"message": "Video processed successfully", "results": results_json, "output_file": output}), 200
-
-    except Exception as e:
-        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
-
-
-@app.route('/queue_video_batch', methods=['POST'])
-def queue_video_batch():
-    try:
-        # Parse the request data
-        data = request.json
-        video_path = data.get("video_path")
-        if not video_path:
-            return jsonify({"error": "Missing video_path parameter"}), 400
-
-        # Generate a unique JSONL filename
-        jsonl_filename = f"{os.path.splitext(os.path.basename(video_path))[0]}_batch.jsonl"
-
-        # Process the video and queue the batch
-        batch_info = process_video_batch(
-            video_path=video_path,
-            jsonl_filename=jsonl_filename,
-            seconds_per_frame=0.5,
-            max_frames=100
-        )
-
-        return jsonify({
-            "message": "Batch created successfully",
-            "batch_id": batch_info["id"],
-            "status": batch_info["status"],
-            "input_file_id": batch_info["input_file_id"]
-        }), 200
-
-    except Exception as e:
-        return jsonify({"error": "An error occurred", "details": str(e)}), 500
-
-
-if __name__ == '__main__':
-    app.run(debug=True)
+from flask import Flask, request, jsonify
+from openai import OpenAI
+import os
+from gpt4ovideo import process_video
+from gpt4obatch import process_video_batch
+from frame_source import BACKENDS
+from result_cache import ResultCache
+from batch_manager import BatchManager
+from job_queue import JobQueue, QueueFull
+
+
+MODEL = "gpt-4o-2024-08-06"
+client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", None))
+
+app = Flask(__name__)
+result_cache = ResultCache()
+batch_manager = BatchManager()
+job_queue = JobQueue(workers=int(os.environ.get("VIDEO_WORKERS", "2")))
+
+
+def run_video_job(video_path, output, progress=None, cancel=None, **options):
+    results_df = process_video(video_path, excel_filename=output, progress=progress, cancel=cancel, **options)
+    return {"results": results_df.to_dict(orient="records"), "output_file": output}
+
+
+@app.route('/queue_video', methods=['POST'])
+def queue_video():
+    try:
+        data = request.json
+        video_path = data.get('video_path')
+        if not video_path or not os.path.exists(video_path):
+            return jsonify({"error": "Invalid or missing 'video_path' parameter"}), 400
+
+        output = data.get('output')
+        if not output:
+            clip_name = os.path.splitext(os.path.basename(video_path))[0]
+            output = f"{clip_name}_output.xlsx"
+
+        backend = data.get('decoder', 'cv2')
+        if backend not in BACKENDS:
+            return jsonify({"error": f"Unsupported decoder. Use one of: {', '.join(BACKENDS)}."}), 400
+        if data.get('mosaic') and not data.get('hud_crop'):
+            return jsonify({"error": "'mosaic' requires 'hud_crop'."}), 400
+
+        job_id = job_queue.submit(
+            run_video_job, video_path=video_path, output=output, backend=backend,
+            dedup_threshold=data.get('dedup_threshold'), game=data.get('game'),
+            hud_crop=bool(data.get('hud_crop', False)), mosaic=bool(data.get('mosaic', False)),
+            cache=result_cache if data.get('use_cache', False) else None,
+            concurrency=int(data.get('concurrency', 1)), pipeline=bool(data.get('pipeline', False)),
+            segments=int(data.get('segments', 1)), checkpoint=bool(data.get('checkpoint', False)),
+            adaptive_batching=bool(data.get('adaptive_batching', False)),
+            digit_reader=bool(data.get('digit_reader', False)),
+            game_session=bool(data.get('game_session', False)),
+            field_tracking=bool(data.get('field_tracking', False)),
+            payload_bytes=int(data['payload_bytes']) if data.get('payload_bytes') else None,
+            validate=bool(data.get('validate', False))
+        )
+        return jsonify({"message": "Video queued", "job_id": job_id, "status_url": f"/jobs/{job_id}",
+                        "output_file": output}), 202
+
+    except QueueFull as e:
+        return jsonify({"error": "Too many queued jobs, try again later", "details": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(status), 200
+
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if status["status"] != "completed":
+        code = 202 if status["status"] in ("queued", "running") else 409
+        return jsonify({"message": f"Job is {status['status']}", **status}), code
+    return jsonify({"message": "Video processed successfully", **job_queue.result(job_id)}), 200
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if job_queue.status(job_id) is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if not job_queue.cancel(job_id):
+        return jsonify({"message": "Job already finished", **job_queue.status(job_id)}), 409
+    return jsonify({"message": "Cancellation requested", **job_queue.status(job_id)}), 202
+
+
+@app.route('/queue_video_batch', methods=['POST'])
+def queue_video_batch():
+    try:
+        # Parse the request data
+        data = request.json
+        video_path = data.get("video_path")
+        if not video_path:
+            return jsonify({"error": "Missing video_path parameter"}), 400
+
+        # Generate a unique JSONL filename
+        jsonl_filename = f"{os.path.splitext(os.path.basename(video_path))[0]}_batch.jsonl"
+
+        # Process the video and queue the batch
+        batch_info = process_video_batch(
+            video_path=video_path,
+            jsonl_filename=jsonl_filename,
+            seconds_per_frame=0.5,
+            max_frames=100,
+            game=data.get("game"),
+            hud_crop=bool(data.get("hud_crop", False)),
+            segments=int(data.get("segments", 1)),
+            batch_size=int(data.get("batch_size", 10)),
+            frame_size=tuple(data["frame_size"]) if data.get("frame_size") else None,
+            payload_bytes=int(data["payload_bytes"]) if data.get("payload_bytes") else None,
+            manager=batch_manager
+        )
+
+        return jsonify({
+            "message": "Batch created successfully",
+            "batch_id": batch_info["batches"][0].id if batch_info["batches"] else None,
+            "batches": [{"batch_id": batch.id, "status": batch.status, "input_file_id": batch.input_file_id}
+                        for batch in batch_info["batches"]],
+            "manifest": batch_info["manifest"]
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+
+@app.route('/batch_status', methods=['GET'])
+def batch_status():
+    try:
+        # One pass over every due batch; batches still backing off keep their last known status
+        pending = batch_manager.poll(force=request.args.get("force") == "1")
+        manifest = request.args.get("manifest")
+        return jsonify({"pending": pending, "batches": batch_manager.batches(manifest)}), 200
+
+    except Exception as e:
+        return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+
+@app.route('/batch_results', methods=['POST'])
+def batch_results():
+    try:
+        data = request.json
+        manifest = data.get("manifest")
+        if not manifest or not os.path.exists(manifest):
+            return jsonify({"error": "Invalid or missing 'manifest' parameter"}), 400
+
+        batch_manager.poll(force=True)
+        try:
+            results_df, errors = batch_manager.collect(manifest)
+        except RuntimeError as e:
+            return jsonify({"message": str(e), "batches": batch_manager.batches(manifest)}), 202
+
+        output = data.get("output") or f"{os.path.splitext(os.path.basename(manifest))[0]}_results.xlsx"
+        results_df.to_excel(f"output/{output}", index=False)
+        return jsonify({"message": "Batch results collected", "results": results_df.to_dict(orient="records"),
+                        "errors": errors, "output_file": output}), 200
+
+    except KeyError as e:
+        return jsonify({"error": "Unknown manifest", "details": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,152 @@
+import threading
+import cv2
+from hud_mosaic import fit_high_detail, image_tokens
+from request_builder import image_part
+
+# (file extension, MIME type, quality flag) per codec, in order of preference
+PAYLOAD_CODECS = {
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+}
+TARGET_PAYLOAD_BYTES = 48 * 1024
+MIN_QUALITY = 50
+MAX_QUALITY = 90
+QUALITY_SEARCH_STEPS = 4
+# Low-detail images are resized to fit 512x512 by the API, larger uploads only cost bandwidth
+LOW_DETAIL_SIDE = 512
+# Images whose short side would end up below this in low detail (wide HUD strips) are sent in high detail
+MIN_LOW_DETAIL_SHORT_SIDE = 96
+MIN_SIDE = 256
+DOWNSCALE_STEP = 0.75
+
+
+class PayloadEncoder:
+    """
+    Encode frames for upload under a byte budget (and, for high detail, a token budget).
+
+    The frame is first sized for the detail level: no larger than the API keeps, and for
+    high detail shrunk until its image tokens fit max_tokens. Each codec in order is then
+    tried at max_quality and, if too big, binary searched down to min_quality; the first
+    codec that fits wins. Only when nothing fits at min_quality is the frame downscaled,
+    since HUD text suffers more from lost pixels than from compression. Encoders missing
+    from the OpenCV build are skipped. In low detail, an image that fitting into 512x512
+    would squash below MIN_LOW_DETAIL_SHORT_SIDE (a wide HUD strip or mosaic) is sent in
+    high detail instead, so its text keeps a readable height.
+    """
+
+    def __init__(self, max_bytes=TARGET_PAYLOAD_BYTES, detail="low", codecs=tuple(PAYLOAD_CODECS),
+                 min_quality=MIN_QUALITY, max_quality=MAX_QUALITY, max_tokens=None):
+        self.max_bytes = max_bytes
+        self.detail = detail
+        self.codecs = [codec for codec in codecs if codec in PAYLOAD_CODECS]
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.max_tokens = max_tokens
+        self.lock = threading.Lock()
+        self.stats = {"frames": 0, "bytes": 0, "quality": 0, "downscaled": 0, "over_budget": 0, "high_detail": 0,
+                      "codecs": {codec: 0 for codec in self.codecs}}
+
+    def detail_for(self, width, height):
+        """Detail level to send an image of this size with."""
+        if self.detail != "low":
+            return self.detail
+        scale = min(1.0, LOW_DETAIL_SIDE / max(width, height))
+        return "high" if min(width, height) * scale < MIN_LOW_DETAIL_SHORT_SIDE else "low"
+
+    def _target_size(self, width, height, detail):
+        if detail == "low":
+            scale = min(1.0, LOW_DETAIL_SIDE / max(width, height))
+            return int(width * scale), int(height * scale)
+        width, height = fit_high_detail(width, height)
+        while self.max_tokens and image_tokens(width, height, "high") > self.max_tokens and min(width, height) > MIN_SIDE:
+            width, height = int(width * DOWNSCALE_STEP), int(height * DOWNSCALE_STEP)
+        return width, height
+
+    def _encode(self, image, codec, quality):
+        extension, _, flag = PAYLOAD_CODECS[codec]
+        try:
+            success, buffer = cv2.imencode(extension, image, [flag, quality])
+        except cv2.error:
+            success = False
+        if not success:
+            # Not built into this OpenCV, do not try it again
+            self.codecs = [name for name in self.codecs if name != codec]
+            return None
+        return buffer
+
+    def _search(self, image, codec):
+        """(quality, buffer) at the highest quality that fits max_bytes, or None."""
+        buffer = self._encode(image, codec, self.max_quality)
+        if buffer is None:
+            return None
+        if len(buffer) <= self.max_bytes:
+            return self.max_quality, buffer
+        best = None
+        low, high = self.min_quality, self.max_quality - 1
+        for _ in range(QUALITY_SEARCH_STEPS):
+            if low > high:
+                break
+            quality = (low + high) // 2
+            buffer = self._encode(image, codec, quality)
+            if len(buffer) <= self.max_bytes:
+                best = (quality, buffer)
+                low = quality + 1
+            else:
+                high = quality - 1
+        if best is None:
+            buffer = self._encode(image, codec, self.min_quality)
+            best = (self.min_quality, buffer) if len(buffer) <= self.max_bytes else None
+        return best
+
+    def encode(self, frame, detail=None):
+        """Return (encoded bytes, MIME type) for one frame, sized for detail (default: detail_for the frame)."""
+        height, width = frame.shape[:2]
+        detail = detail or self.detail_for(width, height)
+        if detail != self.detail:
+            with self.lock:
+                self.stats["high_detail"] += 1
+        target = self._target_size(width, height, detail)
+        downscaled = False
+        while True:
+            image = frame if target == (width, height) else cv2.resize(frame, target, interpolation=cv2.INTER_AREA)
+            for codec in list(self.codecs):
+                found = self._search(image, codec)
+                if found is not None:
+                    quality, buffer = found
+                    self._record(codec, quality, len(buffer), downscaled)
+                    return buffer.tobytes(), PAYLOAD_CODECS[codec][1]
+            if min(target) * DOWNSCALE_STEP < MIN_SIDE or not self.codecs:
+                break
+            target = (int(target[0] * DOWNSCALE_STEP), int(target[1] * DOWNSCALE_STEP))
+            downscaled = True
+
+        # Nothing fits: send the smallest candidate rather than drop the frame
+        codec = self.codecs[-1] if self.codecs else "jpeg"
+        _, buffer = cv2.imencode(PAYLOAD_CODECS[codec][0], image, [PAYLOAD_CODECS[codec][2], self.min_quality])
+        self._record(codec, self.min_quality, len(buffer), downscaled, over_budget=True)
+        return buffer.tobytes(), PAYLOAD_CODECS[codec][1]
+
+    def part(self, frame):
+        """Image content part for a frame, with the MIME type of the codec that was picked and its detail level."""
+        detail = self.detail_for(frame.shape[1], frame.shape[0])
+        data, mime = self.encode(frame, detail)
+        return image_part(data, mime, detail)
+
+    def _record(self, codec, quality, size, downscaled, over_budget=False):
+        with self.lock:
+            self.stats["frames"] += 1
+            self.stats["bytes"] += size
+            self.stats["quality"] += quality
+            self.stats["downscaled"] += downscaled
+            self.stats["over_budget"] += over_budget
+            self.stats["codecs"][codec] = self.stats["codecs"].get(codec, 0) + 1
+
+    def report(self, label="video"):
+        """Print and return bytes per frame (upload bandwidth) and how the budget was met."""
+        stats = self.stats
+        frames = max(1, stats["frames"])
+        print(f"Payload for {label}: {stats['frames']} frames, {stats['bytes'] / frames / 1024:.1f} KB per frame "
+              f"({stats['bytes'] / 1e6:.1f} MB total, budget {self.max_bytes / 1024:.0f} KB), mean quality "
+              f"{stats['quality'] / frames:.0f}, {stats['downscaled']} downscaled, {stats['over_budget']} over "
+              f"budget, {stats['high_detail']} sent in high detail, codecs {stats['codecs']}.")
+        return {**stats, "bytes_per_frame": stats["bytes"] / frames}
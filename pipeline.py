@@ -0,0 +1,150 @@
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+PUT_TIMEOUT_SECONDS = 0.1
+
+
+class StageStats:
+    """Busy time, item count and queue depth of one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def timed(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.busy += time.perf_counter() - start
+                self.items += 1
+
+    def sample(self, stage_queue):
+        depth = stage_queue.qsize()
+        with self.lock:
+            self.depth_samples += 1
+            self.depth_total += depth
+            self.max_depth = max(self.max_depth, depth)
+
+
+class PipelineStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = StageStats(name)
+        return self.stages[name]
+
+    def report(self, label="video", workers=None):
+        """Print and return per-stage utilisation (busy time / wall time, per worker) and queue depths."""
+        wall = time.perf_counter() - self.started
+        summary = {}
+        print(f"Pipeline stats for {label} ({wall:.1f}s wall):")
+        for name, stats in self.stages.items():
+            parallelism = (workers or {}).get(name, 1)
+            utilisation = stats.busy / (wall * parallelism) if wall else 0.0
+            mean_depth = stats.depth_total / stats.depth_samples if stats.depth_samples else 0.0
+            summary[name] = {"items": stats.items, "busy_seconds": stats.busy, "utilisation": utilisation,
+                             "mean_queue_depth": mean_depth, "max_queue_depth": stats.max_depth}
+            print(f"  {name:>10}: {stats.items} items, {100 * utilisation:.0f}% busy, "
+                  f"queue depth mean {mean_depth:.1f} / max {stats.max_depth}")
+        return summary
+
+
+def _put(stage_queue, item, stop):
+    """Blocking put that gives up once the consumer has stopped, so producers never hang."""
+    while not stop.is_set():
+        try:
+            stage_queue.put(item, timeout=PUT_TIMEOUT_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(source, stage_queue, stats, stop):
+    try:
+        iterator = iter(source)
+        while not stop.is_set():
+            with stats.timed():
+                item = next(iterator, _DONE)
+            if item is _DONE:
+                break
+            if not _put(stage_queue, item, stop):
+                return
+            stats.sample(stage_queue)
+        _put(stage_queue, _DONE, stop)
+    except BaseException as e:
+        _put(stage_queue, e, stop)
+
+
+def _dispatch(input_queue, output_queue, pool, transform, stats, stop):
+    try:
+        while not stop.is_set():
+            try:
+                item = input_queue.get(timeout=PUT_TIMEOUT_SECONDS)
+            except queue.Empty:
+                continue
+            if item is _DONE or isinstance(item, BaseException):
+                _put(output_queue, item, stop)
+                return
+
+            def run(item=item):
+                with stats.timed():
+                    return transform(item)
+
+            if not _put(output_queue, pool.submit(run), stop):
+                return
+            stats.sample(output_queue)
+    except BaseException as e:
+        _put(output_queue, e, stop)
+
+
+def iter_pipelined(source, transform, workers=4, source_queue_size=4, stats=None,
+                   source_stage="decode", transform_stage="encode"):
+    """
+    Overlap a producer and a CPU-heavy transform with whatever consumes the results.
+
+    source is iterated on its own thread, transform runs on a pool of workers (cv2 encoding
+    releases the GIL), and the transformed items are yielded in source order. Both queues
+    are bounded, so a slow consumer backs the whole pipeline up instead of growing memory.
+    """
+    stats = stats or PipelineStats()
+    stop = threading.Event()
+    source_queue = queue.Queue(maxsize=source_queue_size)
+    output_queue = queue.Queue(maxsize=2 * workers)
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    threads = [
+        threading.Thread(target=_produce, args=(source, source_queue, stats.stage(source_stage), stop),
+                         daemon=True),
+        threading.Thread(target=_dispatch, args=(source_queue, output_queue, pool, transform,
+                                                  stats.stage(transform_stage), stop), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = output_queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item.result()
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,194 @@
+import json
+import base64
+from functools import lru_cache
+import cv2
+from hud_layout import HUD_CROP_NOTE
+from hud_mosaic import mosaic_response_format, mosaic_instructions
+
+# Everything up to the first image is byte-identical across requests, so the provider can
+# serve it from its prompt cache. Per-request text (item count, mosaic layout, field subset) goes last.
+SYSTEM_PROMPT = "You are a structured robot that outputs results from gambling frames in a strict format."
+INSTRUCTIONS_TEMPLATE = ("Find and fill these columns with the correct values from the game HUD and not from the "
+                         "game: {columns}. Differentiate between free spins left and auto spins. Feature=True means the bonus feature "
+                         "is active. Usually, the feature comes with free spins left. If Feature=False, it MIGHT have "
+                         "auto spins. Sometimes, synonyms are used instead of the expected words, i.e. balance or coins "
+                         "instead of credit, if you find such a word, extract their value for the 'credit' column. This "
+                         "applies to all columns or for different languages. If something is not present in the "
+                         "image, pass N/A in the field. Include currency in the output. Return one item per image, in "
+                         "the order the images are given.")
+
+ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "Game name": {"type": "string"},
+        "Credit": {"type": "string"},
+        "Bet": {"type": "string"},
+        "Win": {"type": "string"},
+        "Total Win": {"type": "string"},
+        "Free spins left": {"type": "string"},
+        "Auto spins": {"type": "string"},
+        "Feature": {"type": "boolean"}
+    },
+    "required": [
+        "Game name",
+        "Credit",
+        "Bet",
+        "Win",
+        "Total Win",
+        "Free spins left",
+        "Auto spins",
+        "Feature"
+    ],
+    "additionalProperties": False
+}
+
+FIELDS = tuple(ITEM_SCHEMA["required"])
+
+
+def schema_fields(fields=None):
+    """The requested fields as a tuple in schema order, or None when that is the full schema."""
+    if fields is None:
+        return None
+    wanted = tuple(name for name in FIELDS if name in fields)
+    return None if wanted == FIELDS else wanted
+
+
+def column_list(fields=FIELDS):
+    names = [f"{name} (boolean)" if ITEM_SCHEMA["properties"][name]["type"] == "boolean" else name
+             for name in fields]
+    return f"{', '.join(names[:-1])} and {names[-1]}" if len(names) > 1 else names[0]
+
+
+INSTRUCTIONS = INSTRUCTIONS_TEMPLATE.format(columns=column_list())
+
+
+@lru_cache(maxsize=None)
+def item_schema(fields=None):
+    """ITEM_SCHEMA reduced to a schema_fields() tuple (None keeps every field)."""
+    if fields is None:
+        return ITEM_SCHEMA
+    return {
+        "type": "object",
+        "properties": {name: ITEM_SCHEMA["properties"][name] for name in fields},
+        "required": list(fields),
+        "additionalProperties": False
+    }
+
+
+@lru_cache(maxsize=None)
+def response_format(fields=None, mosaic=False):
+    """Strict response format asking for the given fields of every image (or mosaic tile)."""
+    if mosaic:
+        return mosaic_response_format(item_schema(fields))
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "game_data",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "images": {
+                        "type": "array",
+                        "description": "One item per image, in the order the images were given.",
+                        "items": item_schema(fields)
+                    }
+                },
+                "required": ["images"],
+                "additionalProperties": False
+            },
+            "strict": True
+        }
+    }
+
+
+RESPONSE_FORMAT = response_format(None, False)
+MOSAIC_RESPONSE_FORMAT = response_format(None, True)
+
+
+@lru_cache(maxsize=None)
+def system_message(hud_cropped=False):
+    """The static system message (prompt and instructions for every column), built once per process."""
+    text = f"{SYSTEM_PROMPT}\n\n{INSTRUCTIONS}"
+    if hud_cropped:
+        text = f"{text} {HUD_CROP_NOTE}"
+    return {"role": "system", "content": text}
+
+
+def prompt_fingerprint(hud_cropped=False, mosaic=False, fields=None):
+    """Text that identifies the static prefix and field subset, for cache and checkpoint keys."""
+    fields = schema_fields(fields)
+    text = f"{system_message(hud_cropped)['content']}\nmosaic={mosaic}"
+    return text if fields is None else f"{text}\nfields={column_list(fields)}"
+
+
+def count_instructions(count):
+    return f"There are {count} images. ALWAYS return output from ALL {count} images."
+
+
+def fields_instructions(fields):
+    return f"For these images only return {column_list(fields)}."
+
+
+def encode_frame(frame, quality=None):
+    """JPEG-encode a frame and return the bytes."""
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if quality else []
+    _, buffer = cv2.imencode('.jpg', frame, params)
+    return buffer.tobytes()
+
+
+def image_part(data, mime="image/jpeg", detail="low"):
+    """Content part for already encoded image bytes."""
+    return {"type": "image_url", "image_url": {
+        "url": f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}",
+        "detail": detail
+    }}
+
+
+def build_request(images, model, count=None, hud_cropped=False, mosaic=False, fields=None, **options):
+    """
+    Chat completion arguments for encoded images (JPEG bytes or prepared image parts).
+
+    Static prefix first (response format, system message), then the images, then the
+    short per-request text. count is the number of frames answered for (the tile count
+    of a mosaic); it defaults to the number of images. fields restricts the schema to a
+    subset of the columns and names them in the per-request text, so the system message
+    stays the same for every subset.
+    """
+    parts = [image if isinstance(image, dict) else image_part(image) for image in images]
+    count = count if count is not None else len(parts)
+    text = mosaic_instructions(count) if mosaic else count_instructions(count)
+    fields = schema_fields(fields)
+    if fields is not None:
+        text = f"{text} {fields_instructions(fields)}"
+    return {
+        "model": model,
+        "response_format": response_format(fields, mosaic),
+        "messages": [
+            system_message(hud_cropped),
+            {"role": "user", "content": [*parts, {"type": "text", "text": text}]}
+        ],
+        "temperature": 0.0,
+        **options
+    }
+
+
+def batch_line(custom_id, body):
+    """Wrap chat completion arguments into one Batch API input line."""
+    return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+
+def parse_items(content):
+    """Items of a response content: the "images" list (single objects are wrapped in a list)."""
+    data = json.loads(content)
+    return data["images"] if isinstance(data, dict) and "images" in data else [data]
+
+
+def cached_tokens(usage):
+    """Prompt tokens billed at the cached rate, from an SDK usage object or a Batch output usage dict."""
+    if usage is None:
+        return 0
+    details = usage.get("prompt_tokens_details") if isinstance(usage, dict) else getattr(
+        usage, "prompt_tokens_details", None)
+    if details is None:
+        return 0
+    return (details.get("cached_tokens") if isinstance(details, dict) else details.cached_tokens) or 0
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+CACHE_PATH = "cache/results.sqlite"
+MEMORY_ITEMS = 4096
+MAX_DISK_BYTES = 256 * 1024 * 1024
+
+
+def schema_version(response_format):
+    """Short stable digest of a response format, so schema changes invalidate old entries."""
+    return hashlib.sha256(json.dumps(response_format, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(frame, model, prompt, schema):
+    """
+    Content address of one frame's result: sha256 of the exact pixels sent plus model, prompt and schema.
+
+    The frame is the HUD crop with hud_crop, so only frames whose HUD is identical down to
+    the pixel share a result; a perceptual hash cannot tell "1000.00" from "1008.00".
+    """
+    digest = hashlib.sha256()
+    digest.update(str(frame.shape).encode("utf-8"))
+    digest.update(np.ascontiguousarray(frame).tobytes())
+    for part in (model, prompt, schema):
+        digest.update(b"\0")
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of per-frame model results.
+
+    A bounded in-memory LRU sits in front of a SQLite table. The table is trimmed by
+    least recent use once its payload exceeds max_disk_bytes. Safe to share between
+    threads (e.g. Flask request handlers).
+    """
+
+    def __init__(self, path=CACHE_PATH, memory_items=MEMORY_ITEMS, max_disk_bytes=MAX_DISK_BYTES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self.db.commit()
+        self.disk_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits_memory += 1
+                return json.loads(self.memory[key])
+
+            row = self.db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self._remember(key, row[0])
+            self.hits_disk += 1
+            return json.loads(row[0])
+
+    def put(self, key, result):
+        value = json.dumps(result)
+        size = len(value.encode("utf-8"))
+        with self.lock:
+            self._remember(key, value)
+            previous = self.db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                            (key, value, size, time.time()))
+            self.disk_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Drop the least recently used rows until the table fits max_disk_bytes."""
+        while self.disk_bytes > self.max_disk_bytes:
+            rows = self.db.execute("SELECT key, size FROM results ORDER BY last_used LIMIT 256").fetchall()
+            if not rows:
+                self.disk_bytes = 0
+                break
+            for key, size in rows:
+                self.db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.memory.pop(key, None)
+                self.disk_bytes -= size
+                if self.disk_bytes <= self.max_disk_bytes:
+                    break
+
+    def stats(self):
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+            "memory_items": len(self.memory),
+            "disk_bytes": self.disk_bytes,
+        }
+
+    def report(self, label="video"):
+        stats = self.stats()
+        print(f"Result cache for {label}: {stats['hits_memory']} memory hits, {stats['hits_disk']} disk hits, "
+              f"{stats['misses']} misses ({100 * stats['hit_rate']:.1f}% hit rate).")
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,119 @@
+import os
+import csv
+import pandas as pd
+
+PARQUET_ROW_GROUP_ROWS = 10000
+SINK_FORMATS = ("xlsx", "csv", "parquet")
+
+
+def columns_from_schema(item_schema, leading=(("Timestamp (s)", "number"),)):
+    """Ordered (column, JSON type) pairs for rows built from an item schema."""
+    return list(leading) + [(name, spec.get("type", "string")) for name, spec in item_schema["properties"].items()]
+
+
+class ColumnarAccumulator:
+    """
+    Append-only column store for result rows.
+
+    Rows are appended in O(1) per value into one list per column (missing values become
+    None, new columns are back-filled), so collecting an hour of results never copies
+    what was already collected. to_frame() builds the DataFrame once at the end.
+    """
+
+    def __init__(self, columns=()):
+        self.columns = {name: [] for name in columns}
+        self.rows = 0
+
+    def append(self, rows):
+        for row in rows:
+            for name in row:
+                if name not in self.columns:
+                    self.columns[name] = [None] * self.rows
+            for name, values in self.columns.items():
+                values.append(row.get(name))
+            self.rows += 1
+
+    def __len__(self):
+        return self.rows
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns)
+
+
+class CsvSink:
+    """Stream rows to a CSV file as they arrive."""
+
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=[name for name, _ in columns], extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """Stream rows to a Parquet file, one row group per row_group_rows rows."""
+
+    def __init__(self, path, columns, row_group_rows=PARQUET_ROW_GROUP_ROWS):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        types = {"number": pa.float64(), "integer": pa.int64(), "boolean": pa.bool_()}
+        self.pa = pa
+        self.schema = pa.schema([(name, types.get(kind, pa.string())) for name, kind in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.row_group_rows = row_group_rows
+        self.buffer = ColumnarAccumulator(self.schema.names)
+
+    def _flush(self):
+        if len(self.buffer):
+            columns = {name: self.buffer.columns[name] for name in self.schema.names}
+            self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+            self.buffer = ColumnarAccumulator(self.schema.names)
+
+    def write(self, rows):
+        self.buffer.append(rows)
+        if len(self.buffer) >= self.row_group_rows:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+class ExcelSink:
+    """Stream rows into an .xlsx file with xlsxwriter's constant_memory mode (rows are flushed as written)."""
+
+    def __init__(self, path, columns):
+        import xlsxwriter
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.sheet = self.workbook.add_worksheet()
+        self.names = [name for name, _ in columns]
+        self.sheet.write_row(0, 0, self.names)
+        self.row = 1
+
+    def write(self, rows):
+        for row in rows:
+            self.sheet.write_row(self.row, 0, [row.get(name) for name in self.names])
+            self.row += 1
+
+    def close(self):
+        self.workbook.close()
+
+
+def open_sink(path, columns):
+    """Pick a streaming sink from the file extension (.xlsx, .csv or .parquet)."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if extension == "csv":
+        return CsvSink(path, columns)
+    if extension == "parquet":
+        return ParquetSink(path, columns)
+    if extension == "xlsx":
+        return ExcelSink(path, columns)
+    raise ValueError(f"Unsupported output format: {extension}. Expected one of {SINK_FORMATS}.")
@@ -0,0 +1,145 @@
+import re
+from request_builder import FIELDS, ITEM_SCHEMA
+
+AMOUNT_FIELDS = ("Credit", "Bet", "Win", "Total Win")
+COUNT_FIELDS = ("Free spins left", "Auto spins")
+# Credit may differ from the expected value by this much (rounding of displayed cents)
+ACCOUNTING_TOLERANCE = 0.011
+REQUERY_BATCH_SIZE = 2
+
+
+def _missing(value):
+    return value is None or str(value).strip().upper() in ("", "N/A", "UNKNOWN")
+
+
+def parse_amount(value):
+    """Number shown in a HUD amount such as "€1,234.50", "1.234,50 EUR" or "250"; None for N/A or text."""
+    if isinstance(value, bool) or _missing(value):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r"[^\d.,\-]", "", str(value))
+    if not re.search(r"\d", text):
+        return None
+    # A final separator followed by one or two digits is the decimal point, any other is a thousands separator
+    match = re.match(r"^(-?[\d.,]*?)[.,](\d{1,2})$", text)
+    try:
+        if match:
+            whole, decimals = match.groups()
+            return float(f"{re.sub(r'[.,]', '', whole) or '0'}.{decimals}")
+        return float(re.sub(r"[.,]", "", text))
+    except ValueError:
+        return None
+
+
+def check_item(item):
+    """Problems with one answered item on its own: missing fields, wrong types, unreadable numbers."""
+    if not isinstance(item, dict):
+        return ["not an object"]
+    problems = []
+    for field in FIELDS:
+        if field not in item:
+            problems.append(f"{field} missing")
+            continue
+        value = item[field]
+        expected = ITEM_SCHEMA["properties"][field]["type"]
+        if (expected == "boolean") != isinstance(value, bool):
+            problems.append(f"{field} is not a {expected}")
+        elif field in AMOUNT_FIELDS and not _missing(value) and parse_amount(value) is None:
+            problems.append(f"{field} {value!r} is not an amount")
+        elif field in COUNT_FIELDS and not _missing(value):
+            count = parse_amount(value)
+            if count is None or count < 0 or not count.is_integer():
+                problems.append(f"{field} {value!r} is not a count")
+    return problems
+
+
+def check_transition(previous, item, tolerance=ACCOUNTING_TOLERANCE):
+    """
+    Problems with an item given the frame before it (same game only).
+
+    Between two samples the credit can stay, drop by the bet (spin started), rise by the
+    win (win paid) or both; free spins only count down, except when a feature starts.
+    """
+    if not previous or previous.get("Game name") != item.get("Game name"):
+        return []
+    problems = []
+    credit_before, credit = parse_amount(previous.get("Credit")), parse_amount(item.get("Credit"))
+    if credit_before is not None and credit is not None:
+        bet = parse_amount(item.get("Bet")) or 0.0
+        wins = {parse_amount(item.get("Win")) or 0.0, parse_amount(item.get("Total Win")) or 0.0}
+        expected = {0.0, -bet} | {win for win in wins} | {win - bet for win in wins}
+        delta = credit - credit_before
+        if min(abs(delta - value) for value in expected) > tolerance:
+            problems.append(f"credit changed by {delta:.2f}, expected one of {sorted(expected)}")
+    spins_before, spins = parse_amount(previous.get("Free spins left")), parse_amount(item.get("Free spins left"))
+    if spins_before and spins is not None and spins > spins_before:
+        problems.append(f"free spins went up from {spins_before:.0f} to {spins:.0f}")
+    return problems
+
+
+class ResultValidator:
+    """
+    Check model answers before they become rows and pick between an answer and its re-query.
+
+    A frame fails when its request came back with the wrong number of items, when it has
+    no answer, when check_item finds a problem, or when check_transition finds it
+    inconsistent with the row before it. After a re-query the retry is taken if it
+    passes; if it reads the same amounts as the original the original is confirmed (a
+    counter caught mid-animation, a retriggered feature); otherwise a retry that is at
+    least well formed replaces the original.
+    """
+
+    def __init__(self, requery_batch_size=REQUERY_BATCH_SIZE, tolerance=ACCOUNTING_TOLERANCE):
+        self.requery_batch_size = requery_batch_size
+        self.tolerance = tolerance
+        self.stats = {"checked": 0, "failed": 0, "item_count": 0, "item": 0, "transition": 0, "fixed": 0,
+                      "confirmed": 0, "unresolved": 0}
+
+    def problems(self, result, previous):
+        if result is None:
+            return ["no answer"]
+        problems = check_item(result)
+        return problems or check_transition(previous, result, self.tolerance)
+
+    def failing(self, outputs, indices, previous=None, count_ok=True):
+        """{index: problems} for the given output indices, walking all outputs in order for context."""
+        indices = set(indices)
+        failed = {}
+        for i, result in enumerate(outputs):
+            if i in indices:
+                self.stats["checked"] += 1
+                problems = ["wrong item count"] if not count_ok else self.problems(result, previous)
+                if problems:
+                    failed[i] = problems
+                    self.stats["failed"] += 1
+                    kind = "item_count" if not count_ok else "transition" if result and not check_item(result) \
+                        else "item"
+                    self.stats[kind] += 1
+            # A failed answer is no context for the next frame, or one bad reading fails two frames
+            if result is not None and i not in failed:
+                previous = result
+        return failed
+
+    def resolve(self, original, retry, previous=None):
+        """The result to keep for a frame that failed, given its re-query."""
+        retry = retry if isinstance(retry, dict) else None
+        if retry is not None and not self.problems(retry, previous):
+            self.stats["fixed"] += 1
+            return retry
+        if retry is not None and original is not None and all(
+                parse_amount(retry.get(field)) == parse_amount(original.get(field))
+                for field in AMOUNT_FIELDS + COUNT_FIELDS):
+            self.stats["confirmed"] += 1
+            return original
+        self.stats["unresolved"] += 1
+        if retry is not None and not check_item(retry):
+            return retry
+        return original
+
+    def report(self, label="video"):
+        stats = self.stats
+        print(f"Validation for {label}: {stats['failed']} of {stats['checked']} answers failed "
+              f"({stats['item_count']} item count, {stats['item']} malformed, {stats['transition']} accounting); "
+              f"re-queries fixed {stats['fixed']}, confirmed {stats['confirmed']}, left {stats['unresolved']}.")
+        return dict(stats)
@@ -0,0 +1,131 @@
+import os
+import queue
+import traceback
+import subprocess
+import multiprocessing
+import cv2
+import numpy as np
+from frame_source import iter_frames, open_video, frame_interval_for, probe_keyframe_times
+from hud_layout import resolve_hud_boxes, crop_hud
+
+TRANSPORT_JPEG_QUALITY = 95
+# Sampled frames per batch a segment worker hands back, and batches it may queue ahead
+CHUNK_FRAMES = 32
+CHUNKS_PER_WORKER = 2
+_SEGMENT_DONE = "done"
+
+
+def plan_segments(video_path, segments, seconds_per_frame=1, max_frames=None):
+    """
+    Split a video into at most `segments` half-open frame ranges that start on keyframes.
+
+    Boundaries are the keyframes closest to an even split, so every worker starts with a
+    cheap, exact seek. Ranges cover [0, end) without gaps or overlaps; max_frames caps
+    the end at the last sampled frame that would have been read.
+    """
+    video, fps, total_frames = open_video(video_path)
+    video.release()
+    end_frame = total_frames
+    if max_frames is not None:
+        end_frame = min(total_frames, max_frames * frame_interval_for(fps, seconds_per_frame))
+
+    try:
+        keyframes = [int(round(t * fps)) for t in probe_keyframe_times(video_path)]
+    except (OSError, subprocess.CalledProcessError):
+        # Without ffprobe fall back to even splits; OpenCV then seeks from the previous keyframe
+        keyframes = []
+
+    boundaries = {0}
+    for i in range(1, segments):
+        target = end_frame * i // segments
+        if keyframes:
+            target = min(keyframes, key=lambda keyframe: abs(keyframe - target))
+        if 0 < target < end_frame:
+            boundaries.add(target)
+    starts = sorted(boundaries)
+    return list(zip(starts, starts[1:] + [end_frame]))
+
+
+def _decode_segment(video_path, seconds_per_frame, start_frame, end_frame, boxes, chunk_frames, out):
+    """
+    Worker: decode one keyframe-aligned range in a single pass, crop the HUD and JPEG-encode the frames.
+
+    Frames are handed back through out in batches of chunk_frames; out is bounded, so the
+    worker blocks once it is CHUNKS_PER_WORKER batches ahead of the parent.
+    """
+    try:
+        batch = []
+        for frame_index, timestamp_ms, frame in iter_frames(video_path, seconds_per_frame, start_frame=start_frame,
+                                                            end_frame=end_frame):
+            if boxes:
+                frame = crop_hud(frame, boxes)
+            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, TRANSPORT_JPEG_QUALITY])
+            batch.append((frame_index, timestamp_ms, buffer.tobytes()))
+            if len(batch) >= chunk_frames:
+                out.put(batch)
+                batch = []
+        if batch:
+            out.put(batch)
+        out.put(_SEGMENT_DONE)
+    except BaseException:
+        out.put(traceback.format_exc())
+
+
+def _iter_segment(worker, out):
+    """Yield the encoded frames a segment worker sends, in order, until it is done."""
+    while True:
+        try:
+            item = out.get(timeout=1.0)
+        except queue.Empty:
+            if not worker.is_alive() and out.empty():
+                raise RuntimeError(f"Segment worker exited with code {worker.exitcode} before finishing.")
+            continue
+        if item == _SEGMENT_DONE:
+            return
+        if isinstance(item, str):
+            raise RuntimeError(f"Segment worker failed:\n{item}")
+        yield from item
+
+
+def iter_segment_frames(video_path, seconds_per_frame=1, segments=None, max_frames=None, game=None, hud_crop=False,
+                        chunk_frames=CHUNK_FRAMES):
+    """
+    Yield (frame_index, timestamp_ms, frame) like iter_frames, decoding segments in parallel processes.
+
+    Each keyframe-aligned segment is decoded by one worker process in a single forward
+    pass (one seek, to its starting keyframe), which pre-processes (HUD crop) its frames
+    and hands them back in batches of chunk_frames through a queue holding at most
+    CHUNKS_PER_WORKER batches. The parent yields segment after segment in order, so
+    memory stays bounded whatever the video length and frames flow as soon as the first
+    batch is done. The HUD layout is resolved once up front so every segment is cropped
+    the same way.
+    """
+    segments = segments or os.cpu_count() or 1
+    ranges = plan_segments(video_path, segments, seconds_per_frame, max_frames)
+
+    boxes = None
+    if hud_crop:
+        boxes, _ = resolve_hud_boxes(iter_frames(video_path, seconds_per_frame), game)
+
+    print(f"Decoding {video_path} in {len(ranges)} segment(s).")
+    workers = []
+    try:
+        for start, end in ranges:
+            out = multiprocessing.Queue(maxsize=CHUNKS_PER_WORKER)
+            worker = multiprocessing.Process(target=_decode_segment, daemon=True,
+                                             args=(video_path, seconds_per_frame, start, end, boxes, chunk_frames, out))
+            worker.start()
+            workers.append((worker, out))
+
+        yielded = 0
+        for worker, out in workers:
+            for frame_index, timestamp_ms, data in _iter_segment(worker, out):
+                if max_frames is not None and yielded >= max_frames:
+                    return
+                yield frame_index, timestamp_ms, cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                yielded += 1
+    finally:
+        for worker, out in workers:
+            worker.terminate()
+            out.cancel_join_thread()
+            worker.join()